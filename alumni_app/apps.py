@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class AlumniAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'alumni_app'
+
+    def ready(self):
+        from django.core.signals import request_started
+
+        from .autocomplete import warm_up
+
+        request_started.connect(warm_up, dispatch_uid='alumni_app.autocomplete')
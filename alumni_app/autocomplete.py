@@ -0,0 +1,252 @@
+import bisect
+import heapq
+import logging
+import sys
+import threading
+import time
+
+from django.conf import settings
+from django.core.signals import request_started
+from django.db import connection
+
+from .models import Alumni
+
+logger = logging.getLogger(__name__)
+
+AUTOCOMPLETE_FIELDS = ('name', 'company', 'industry', 'location')
+# Name suggestions reveal who is in the directory, so they need a session
+PUBLIC_FIELDS = ('company', 'industry', 'location')
+AUTOCOMPLETE_LIMIT = 8
+# Prefixes this short match large ranges, so their results are cached per prefix
+CACHED_PREFIX_LENGTH = 2
+# Rebuild from the database at least this often (seconds), to pick up writes
+# made by other processes
+INDEX_MAX_AGE = 600
+
+
+def _normalize(value):
+    return ' '.join(str(value).lower().split())
+
+
+class PrefixIndex:
+    """Sorted array of normalized values with a count per value.
+
+    A prefix query is two bisections into the sorted keys, i.e. the leaves of a
+    flattened trie, and the most common values in that range are returned.
+    """
+
+    def __init__(self):
+        self.keys = []
+        self.counts = {}
+        self.display = {}
+        self._top = {}
+
+    def add(self, value, display=None, amount=1):
+        key = _normalize(value)
+        if not key:
+            return
+        count = self.counts.get(key, 0) + amount
+        if count <= 0:
+            self.counts.pop(key, None)
+            self.display.pop(key, None)
+            index = bisect.bisect_left(self.keys, key)
+            if index < len(self.keys) and self.keys[index] == key:
+                del self.keys[index]
+        else:
+            if key not in self.counts:
+                bisect.insort(self.keys, key)
+            self.counts[key] = count
+            self.display.setdefault(key, display or str(value).strip())
+        for length in range(1, min(len(key), CACHED_PREFIX_LENGTH) + 1):
+            self._top.pop(key[:length], None)
+
+    def discard(self, value):
+        self.add(value, amount=-1)
+
+    def finish(self, keys):
+        """Bulk load: sort the keys counted during a build in one pass"""
+        self.keys = sorted(keys)
+
+    def complete(self, prefix, limit=AUTOCOMPLETE_LIMIT):
+        prefix = _normalize(prefix)
+        if not prefix:
+            return []
+        if len(prefix) <= CACHED_PREFIX_LENGTH and limit <= AUTOCOMPLETE_LIMIT:
+            cached = self._top.get(prefix)
+            if cached is None:
+                cached = self._top[prefix] = self._range_top(prefix, AUTOCOMPLETE_LIMIT)
+            return cached[:limit]
+        return self._range_top(prefix, limit)
+
+    def _range_top(self, prefix, limit):
+        start = bisect.bisect_left(self.keys, prefix)
+        end = bisect.bisect_left(self.keys, prefix + '\uffff', start)
+        best = heapq.nsmallest(limit, self.keys[start:end], key=lambda key: (-self.counts[key], key))
+        return [self.display[key] for key in best]
+
+    def nbytes(self):
+        """Approximate memory held by the index, including the key strings"""
+        size = sys.getsizeof(self.keys) + sys.getsizeof(self.counts) + sys.getsizeof(self.display)
+        size += sum(sys.getsizeof(key) for key in self.keys)
+        size += sum(sys.getsizeof(value) for value in self.display.values())
+        size += sys.getsizeof(self._top) + sum(sys.getsizeof(top) for top in self._top.values())
+        return size
+
+
+def autocomplete_values(alumni):
+    """Values one alumni contributes, per field; empty when the alumni is inactive"""
+    if alumni is None or not alumni.is_active:
+        return {}
+    return _row_values(alumni.first_name, alumni.last_name, alumni.company, alumni.industry, alumni.location)
+
+
+def _row_values(first_name, last_name, company, industry, location):
+    return {
+        'name': [f'{first_name} {last_name}'.strip(), last_name],
+        'company': [company],
+        'industry': [industry],
+        'location': [location],
+    }
+
+
+def build_indexes(seen=None):
+    """One streaming pass over active alumni into a PrefixIndex per field.
+
+    ``seen``, if given, is filled with each alumni's row as read, by id.
+    """
+    indexes = {field: PrefixIndex() for field in AUTOCOMPLETE_FIELDS}
+    rows = Alumni.objects.filter(is_active=True).values_list(
+        'id', 'first_name', 'last_name', 'company', 'industry', 'location'
+    ).iterator(chunk_size=2000)
+    for alumni_id, first_name, last_name, company, industry, location in rows:
+        if seen is not None:
+            seen[alumni_id] = (first_name, last_name, company, industry, location)
+        full_name = f'{first_name} {last_name}'.strip()
+        for field, values in (
+            ('name', (full_name, last_name)), ('company', (company,)),
+            ('industry', (industry,)), ('location', (location,)),
+        ):
+            index = indexes[field]
+            for value in values:
+                key = _normalize(value or '')
+                if key:
+                    index.counts[key] = index.counts.get(key, 0) + 1
+                    index.display.setdefault(key, value.strip())
+    for index in indexes.values():
+        index.finish(index.counts)
+    return indexes
+
+
+_indexes = None
+_built_at = 0
+_lock = threading.Lock()
+# Held by the one thread building new indexes; changes applied to the current
+# indexes meanwhile are recorded in _changes as (alumni_id, after) and replayed
+# onto the new ones
+_build_lock = threading.Lock()
+_changes = None
+
+
+def _apply(indexes, before, after):
+    for field in AUTOCOMPLETE_FIELDS:
+        index = indexes[field]
+        for value in before.get(field, []):
+            if value:
+                index.discard(value)
+        for value in after.get(field, []):
+            if value:
+                index.add(value)
+
+
+def _rebuild():
+    """Build new indexes without holding _lock, then swap them in; needs _build_lock"""
+    global _indexes, _built_at, _changes
+    with _lock:
+        _changes = []
+    seen = {}
+    try:
+        indexes = build_indexes(seen)
+    except BaseException:
+        with _lock:
+            _changes = None
+        raise
+    with _lock:
+        # The build may have read a change's row before or after it was saved,
+        # so each changed alumni's row as read is swapped for their latest
+        # values rather than the change being applied on top
+        latest = dict(_changes)
+        for alumni_id, after in latest.items():
+            _apply(indexes, _row_values(*seen[alumni_id]) if alumni_id in seen else {}, after)
+        _indexes, _built_at, _changes = indexes, time.monotonic(), None
+
+
+def _rebuild_in_background():
+    try:
+        _rebuild()
+    except Exception:
+        logger.exception('Rebuilding the autocomplete indexes failed')
+    finally:
+        _build_lock.release()
+        connection.close()
+
+
+def warm_up(**kwargs):
+    """Build the indexes in the background on the first request a process serves.
+
+    Connected to request_started rather than run from AppConfig.ready(), so
+    management commands do not scan the table.
+    """
+    request_started.disconnect(warm_up, dispatch_uid=__name__)
+    if not getattr(settings, 'AUTOCOMPLETE_WARM_UP', True):
+        return
+    with _lock:
+        if _indexes is not None:
+            return
+    if _build_lock.acquire(blocking=False):
+        threading.Thread(target=_rebuild_in_background, daemon=True).start()
+
+
+def get_indexes():
+    """Return the process-wide indexes.
+
+    The first call builds them. Once built, stale indexes keep answering while a
+    background thread rebuilds them, so requests never wait on a table scan.
+    """
+    with _lock:
+        indexes, built_at = _indexes, _built_at
+    if indexes is None:
+        with _build_lock:
+            if _indexes is None:
+                _rebuild()
+        with _lock:
+            return _indexes
+    if time.monotonic() - built_at > INDEX_MAX_AGE and _build_lock.acquire(blocking=False):
+        if _built_at == built_at:
+            threading.Thread(target=_rebuild_in_background, daemon=True).start()
+        else:
+            # Another thread finished a rebuild in the meantime
+            _build_lock.release()
+    return indexes
+
+
+def complete(field, prefix, limit=AUTOCOMPLETE_LIMIT):
+    index = get_indexes()[field]
+    with _lock:
+        return index.complete(prefix, limit)
+
+
+def update_autocomplete(alumni_id, before, after):
+    """Apply one alumni's change; both sides come from autocomplete_values()"""
+    with _lock:
+        # Before the first build there is nothing to update, only a build to replay onto
+        if _indexes is not None:
+            _apply(_indexes, before, after)
+        if _changes is not None:
+            _changes.append((alumni_id, after))
+
+
+def index_stats():
+    """Entries and approximate bytes per field of the current indexes"""
+    indexes = get_indexes()
+    with _lock:
+        return {field: (len(index.keys), index.nbytes()) for field, index in indexes.items()}
@@ -0,0 +1,90 @@
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import Greatest
+
+from .models import ChatParticipant, Notification, UnreadCounter
+
+# A missing UnreadCounter row means "not computed yet": increments skip it and
+# the first read computes it from the source tables. That read creates the row
+# before recounting, so a change committed in between is either in the recount
+# or lands on the row after it, never lost.
+
+
+def notify(alumni_id, message):
+    """Create a notification and count it as unread"""
+    with transaction.atomic():
+        notification = Notification.objects.create(alumni_id=alumni_id, message=message)
+        add_unread([alumni_id], notifications=1)
+    return notification
+
+
+def add_unread(alumni_ids, notifications=0, messages=0):
+    """Increment the counters of ``alumni_ids`` (a list or an id queryset)"""
+    UnreadCounter.objects.filter(alumni_id__in=alumni_ids).update(
+        notifications=F('notifications') + notifications,
+        messages=F('messages') + messages,
+    )
+
+
+def clear_notifications(alumni_id):
+    UnreadCounter.objects.filter(alumni_id=alumni_id, notifications__gt=0).update(notifications=0)
+
+
+def read_messages(alumni_id, count):
+    UnreadCounter.objects.filter(alumni_id=alumni_id, messages__gt=0).update(
+        messages=Greatest(F('messages') - count, 0)
+    )
+
+
+def expected_counts(alumni_ids=None):
+    """{alumni_id: (notifications, messages)} recounted from Notification and ChatParticipant"""
+    notifications = Notification.objects.filter(is_read=False)
+    participants = ChatParticipant.objects.filter(unread_count__gt=0)
+    if alumni_ids is not None:
+        notifications = notifications.filter(alumni_id__in=alumni_ids)
+        participants = participants.filter(alumni_id__in=alumni_ids)
+    notification_counts = Counter(dict(
+        notifications.values('alumni_id').annotate(total=Count('id')).values_list('alumni_id', 'total')
+    ))
+    message_counts = Counter(dict(
+        participants.values('alumni_id').annotate(total=Sum('unread_count')).values_list('alumni_id', 'total')
+    ))
+    return {
+        alumni_id: (notification_counts[alumni_id], message_counts[alumni_id])
+        for alumni_id in set(notification_counts) | set(message_counts)
+    }
+
+
+def unread_counts(alumni_id):
+    """(notifications, messages) for one alumnus: a primary-key lookup once the row exists"""
+    counter = UnreadCounter.objects.filter(alumni_id=alumni_id).values_list('notifications', 'messages').first()
+    if counter is None:
+        UnreadCounter.objects.get_or_create(alumni_id=alumni_id)
+        with transaction.atomic():
+            # Lock with a write first (the row lock, or SQLite's write lock) so
+            # increments wait and none can slip between the recount and the set
+            UnreadCounter.objects.filter(alumni_id=alumni_id).update(messages=F('messages'))
+            counter = expected_counts([alumni_id]).get(alumni_id, (0, 0))
+            UnreadCounter.objects.filter(alumni_id=alumni_id).update(notifications=counter[0], messages=counter[1])
+    return counter
+
+
+def reconcile_counters():
+    """Rewrite counters that drifted from the source tables; returns (fixed, created)"""
+    expected = expected_counts()
+    fixed = 0
+    with transaction.atomic():
+        for counter in UnreadCounter.objects.all().iterator():
+            counts = expected.pop(counter.alumni_id, (0, 0))
+            if (counter.notifications, counter.messages) != counts:
+                UnreadCounter.objects.filter(alumni_id=counter.alumni_id).update(
+                    notifications=counts[0], messages=counts[1]
+                )
+                fixed += 1
+        UnreadCounter.objects.bulk_create([
+            UnreadCounter(alumni_id=alumni_id, notifications=counts[0], messages=counts[1])
+            for alumni_id, counts in expected.items()
+        ], batch_size=1000)
+    return fixed, len(expected)
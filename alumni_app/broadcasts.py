@@ -0,0 +1,106 @@
+import logging
+import uuid
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.db.models import F, Max
+from django.utils import timezone
+
+from .badges import add_unread
+from .models import Alumni, Broadcast, Notification
+
+logger = logging.getLogger(__name__)
+
+# Recipients per INSERT ... SELECT; each chunk is its own short transaction so
+# the SQLite write lock is released between chunks
+BROADCAST_CHUNK = 5000
+# A running broadcast not checkpointed for this long belongs to a worker that died
+STALE_AFTER = timedelta(minutes=10)
+
+AUDIENCES = {
+    'active': lambda: Alumni.objects.filter(is_active=True),
+}
+
+
+def queue_broadcast(message, audience='active', event=None):
+    """Queue a notification for everyone in ``audience``; the send_broadcasts worker delivers it"""
+    return Broadcast.objects.create(message=message[:255], audience=audience, event=event)
+
+
+def claim_broadcast():
+    """Mark the oldest pending broadcast as running under a fresh token and return it"""
+    token = uuid.uuid4().hex
+    with transaction.atomic():
+        broadcast_id = Broadcast.objects.filter(status='pending').order_by('id').values_list('id', flat=True).first()
+        if broadcast_id is None:
+            return None
+        now = timezone.now()
+        Broadcast.objects.filter(id=broadcast_id, status='pending').update(
+            status='running', worker=token, started_at=now, checkpoint_at=now
+        )
+    return Broadcast.objects.filter(worker=token, status='running').first()
+
+
+def requeue_stale_broadcasts():
+    # Progress is checkpointed with each chunk, so a requeued broadcast resumes where it stopped
+    return Broadcast.objects.filter(
+        status='running', checkpoint_at__lt=timezone.now() - STALE_AFTER
+    ).update(status='pending', worker='')
+
+
+def _insert_notifications(message, recipients):
+    """One INSERT ... SELECT of a notification row per alumni id in ``recipients``"""
+    sql, params = recipients.values('id').query.sql_with_params()
+    quote = connection.ops.quote_name
+    columns = ', '.join(quote(Notification._meta.get_field(name).column)
+                        for name in ('alumni', 'message', 'is_read', 'created_at'))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {quote(Notification._meta.db_table)} ({columns}) '
+            f'SELECT recipient.id, %s, %s, %s FROM ({sql}) recipient',
+            [message, False, connection.ops.adapt_datetimefield_value(timezone.now()), *params],
+        )
+        return cursor.rowcount
+
+
+def send_broadcast(broadcast, chunk=BROADCAST_CHUNK, progress=None):
+    """Fan a claimed broadcast out in id-ordered chunks, checkpointing after each one"""
+    audience = AUDIENCES[broadcast.audience]().order_by('id')
+    remaining = audience.filter(id__gt=broadcast.last_alumni_id).count()
+    Broadcast.objects.filter(id=broadcast.id).update(total=broadcast.sent + remaining)
+    broadcast.total = broadcast.sent + remaining
+
+    after = broadcast.last_alumni_id
+    while True:
+        pending = audience.filter(id__gt=after)
+        # The chunk ends at the chunk-th remaining id, or at the last one
+        bound = next(iter(pending.values_list('id', flat=True)[chunk - 1:chunk]), None)
+        if bound is None:
+            bound = pending.aggregate(last=Max('id'))['last']
+            if bound is None:
+                break
+        with transaction.atomic():
+            recipients = pending.filter(id__lte=bound)
+            inserted = _insert_notifications(broadcast.message, recipients)
+            add_unread(recipients.values('id'), notifications=1)
+            Broadcast.objects.filter(id=broadcast.id).update(
+                sent=F('sent') + inserted, last_alumni_id=bound, checkpoint_at=timezone.now()
+            )
+        broadcast.sent += inserted
+        after = bound
+        if progress:
+            progress(broadcast)
+
+    Broadcast.objects.filter(id=broadcast.id).update(status='done', finished_at=timezone.now())
+    return broadcast.sent
+
+
+def run_broadcast(broadcast, **kwargs):
+    try:
+        return send_broadcast(broadcast, **kwargs)
+    except Exception as error:
+        logger.exception('Broadcast %s failed', broadcast.id)
+        Broadcast.objects.filter(id=broadcast.id).update(
+            status='failed', finished_at=timezone.now(), error=repr(error)
+        )
+        return None
@@ -0,0 +1,35 @@
+from django.core.cache import cache
+from django.db.models import Q
+
+from .models import Connection
+
+# Entries are invalidated on every connection change; the timeout only bounds
+# staleness when several processes each keep their own local-memory cache.
+CONNECTIONS_CACHE_TIMEOUT = 300
+
+
+def _cache_key(alumni_id):
+    return f'alumni_connections:{alumni_id}'
+
+
+def connected_ids(alumni_id):
+    """Return the set of alumni ids with an accepted connection to the given alumni"""
+    key = _cache_key(alumni_id)
+    ids = cache.get(key)
+    if ids is None:
+        ids = set()
+        for sender_id, receiver_id in Connection.objects.filter(
+            Q(sender_id=alumni_id) | Q(receiver_id=alumni_id),
+            status='accepted'
+        ).values_list('sender_id', 'receiver_id'):
+            ids.add(receiver_id if sender_id == alumni_id else sender_id)
+        cache.set(key, ids, CONNECTIONS_CACHE_TIMEOUT)
+    return ids
+
+
+def are_connected(alumni_id, other_id):
+    return other_id in connected_ids(alumni_id)
+
+
+def invalidate_connections(*alumni_ids):
+    cache.delete_many([_cache_key(alumni_id) for alumni_id in alumni_ids])
@@ -0,0 +1,114 @@
+from django.core import signing
+from django.db.models import Q
+
+from .search import SEARCH_LIMIT, match_expression, matching_ids, ranked_matches, search_available
+
+DIRECTORY_PAGE_SIZE = 24
+DIRECTORY_ORDER = ('last_name', 'first_name', 'id')
+DIRECTORY_FILTERS = ('search', 'profession', 'location', 'industry', 'graduation_year', 'degree')
+# Facets without a text box are exact selections from the facet list
+EXACT_FILTERS = ('industry', 'graduation_year', 'degree')
+
+_CURSOR_SALT = 'alumni_app.directory'
+
+
+def directory_filters(params):
+    """The non-empty directory filters in a GET QueryDict or dict"""
+    return {name: params[name] for name in DIRECTORY_FILTERS if params.get(name)}
+
+
+def _text_filters(filters):
+    return filters.get('search', ''), filters.get('profession', ''), filters.get('location', '')
+
+
+def is_ranked(filters):
+    """Text filters are matched and ordered by relevance on the FTS5 index when it is available"""
+    return bool(match_expression(*_text_filters(filters))) and search_available()
+
+
+def filter_directory(queryset, filters):
+    """Apply the directory filters; text filters use the FTS5 index when it is available"""
+    search_query, profession_filter, location_filter = _text_filters(filters)
+
+    if is_ranked(filters):
+        queryset = queryset.filter(id__in=matching_ids(search_query, profession_filter, location_filter))
+    else:
+        if search_query:
+            queryset = queryset.filter(
+                Q(first_name__icontains=search_query) |
+                Q(last_name__icontains=search_query)
+            )
+        if profession_filter:
+            queryset = queryset.filter(profession__icontains=profession_filter)
+        if location_filter:
+            queryset = queryset.filter(location__icontains=location_filter)
+
+    exact = {name: filters[name] for name in EXACT_FILTERS if filters.get(name)}
+    if exact:
+        queryset = queryset.filter(**exact)
+    return queryset
+
+
+def encode_directory_cursor(filters, key):
+    """Signed cursor carrying the filters and the last row's sort key"""
+    return signing.dumps({'f': filters, 'k': list(key)}, salt=_CURSOR_SALT, compress=True)
+
+
+def decode_directory_cursor(cursor):
+    """Return (filters, sort key); raises ValueError if the cursor is malformed or tampered with"""
+    try:
+        data = signing.loads(cursor, salt=_CURSOR_SALT)
+        filters = dict(data['f'])
+        if is_ranked(filters):
+            score, alumni_id = data['k']
+            return filters, (float(score), int(alumni_id))
+        last_name, first_name, alumni_id = data['k']
+        return filters, (str(last_name), str(first_name), int(alumni_id))
+    except (signing.BadSignature, KeyError, TypeError, ValueError) as e:
+        raise ValueError('Invalid directory cursor') from e
+
+
+def directory_page(queryset, filters, after=None, limit=DIRECTORY_PAGE_SIZE):
+    """Return (alumni, next_cursor) for one page.
+
+    Text filters page through matches best first by (bm25 score, id); browsing
+    orders by (last_name, first_name, id). ``after`` is the sort key from a
+    previous cursor, so each page is an index seek however deep it is.
+    """
+    if is_ranked(filters):
+        return _ranked_page(queryset, filters, after, limit)
+
+    queryset = queryset.order_by(*DIRECTORY_ORDER)
+    if after is not None:
+        last_name, first_name, alumni_id = after
+        # The redundant lower bound lets SQLite seek the index instead of scanning from the start
+        queryset = queryset.filter(
+            Q(last_name__gte=last_name),
+            Q(last_name__gt=last_name) |
+            Q(last_name=last_name, first_name__gt=first_name) |
+            Q(last_name=last_name, first_name=first_name, id__gt=alumni_id)
+        )
+    page = list(queryset[:limit + 1])
+    next_cursor = None
+    if len(page) > limit:
+        last = page[limit - 1]
+        next_cursor = encode_directory_cursor(filters, [last.last_name, last.first_name, last.id])
+    return page[:limit], next_cursor
+
+
+def _ranked_page(queryset, filters, after, limit):
+    # The search index only knows relevance; the queryset applies every other
+    # filter, one batch of ranked candidates at a time until the page is full
+    page = []
+    while len(page) <= limit:
+        candidates = ranked_matches(*_text_filters(filters), after=after)
+        found = queryset.in_bulk([alumni_id for alumni_id, _ in candidates])
+        for alumni_id, score in candidates:
+            if alumni_id in found:
+                found[alumni_id].search_key = (score, alumni_id)
+                page.append(found[alumni_id])
+        if len(candidates) < SEARCH_LIMIT:
+            break
+        after = (candidates[-1][1], candidates[-1][0])
+    next_cursor = encode_directory_cursor(filters, page[limit - 1].search_key) if len(page) > limit else None
+    return page[:limit], next_cursor
@@ -0,0 +1,190 @@
+import hashlib
+import json
+from collections import Counter
+
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q
+
+from .directory import filter_directory
+from .models import Alumni, FacetCount
+
+FACET_FIELDS = ['profession', 'industry', 'location', 'graduation_year', 'degree']
+FACET_LABELS = {
+    'profession': 'Profession',
+    'industry': 'Industry',
+    'location': 'Location',
+    'graduation_year': 'Graduation year',
+    'degree': 'Degree',
+}
+FACET_LIMIT = 8
+# Listings the store cannot answer are counted once per filter set and shared by
+# every viewer for this long (seconds), so their counts may lag profile edits
+FACET_CACHE_TIMEOUT = 60
+
+
+def facet_values(alumni):
+    """Facet values an alumni currently counts towards; empty when the alumni is inactive"""
+    if alumni is None or not alumni.is_active:
+        return {}
+    values = {}
+    for facet in FACET_FIELDS:
+        value = getattr(alumni, facet)
+        if value is not None and str(value).strip():
+            values[facet] = str(value).strip()[:100]
+    return values
+
+
+def _keys(values):
+    """(filter_facet, filter_value, facet, value) rows one alumni contributes to"""
+    keys = Counter()
+    for facet, value in values.items():
+        keys[('', '', facet, value)] += 1
+        for filter_facet, filter_value in values.items():
+            if filter_facet != facet:
+                keys[(filter_facet, filter_value, facet, value)] += 1
+    return keys
+
+
+def _lookup(key):
+    filter_facet, filter_value, facet, value = key
+    return {'filter_facet': filter_facet, 'filter_value': filter_value, 'facet': facet, 'value': value}
+
+
+def update_facets(before, after):
+    """Move one alumni's contribution from the ``before`` facet values to ``after``.
+
+    Both are dicts from facet_values(); pass {} for an alumni that did not count
+    (new or inactive) or no longer counts.
+    """
+    old, new = _keys(before), _keys(after)
+    removed, added = old - new, new - old
+    if not removed and not added:
+        return
+    with transaction.atomic():
+        for key, amount in removed.items():
+            FacetCount.objects.filter(**_lookup(key)).update(count=F('count') - amount)
+        for key, amount in added.items():
+            if not FacetCount.objects.filter(**_lookup(key)).update(count=F('count') + amount):
+                try:
+                    with transaction.atomic():
+                        FacetCount.objects.create(count=amount, **_lookup(key))
+                except IntegrityError:
+                    # Created concurrently by another request
+                    FacetCount.objects.filter(**_lookup(key)).update(count=F('count') + amount)
+        if removed:
+            stale = Q()
+            for key in removed:
+                stale |= Q(**_lookup(key))
+            FacetCount.objects.filter(stale, count__lte=0).delete()
+
+
+def _grouped(rows):
+    grouped = {facet: [] for facet in FACET_FIELDS}
+    for facet, value, count in rows:
+        if facet in grouped and count > 0 and len(grouped[facet]) < FACET_LIMIT:
+            grouped[facet].append((value, count))
+    return grouped
+
+
+def facet_counts(selected, exclude=None):
+    """Counts per facet value for a set of exact facet selections.
+
+    No selection or a single one is answered from the precomputed rows in one
+    query; returns None for larger selections, which callers count directly.
+    ``exclude`` is facet_values() of an alumni left out of the listing (the
+    viewer), whose own contribution is taken off the precomputed counts.
+    """
+    if len(selected) > 1:
+        return None
+    filter_facet, filter_value = next(iter(selected.items())) if selected else ('', '')
+    filter_value = str(filter_value).strip()
+    # The selected value's own count is its unfiltered count
+    rows = FacetCount.objects.filter(
+        Q(filter_facet=filter_facet, filter_value=filter_value) |
+        Q(filter_facet='', filter_value='', facet=filter_facet, value=filter_value)
+    ).values_list('filter_facet', 'filter_value', 'facet', 'value', 'count')
+    own = _keys(exclude or {})
+    rows = sorted(
+        ((facet, value, count - own[(row_filter_facet, row_filter_value, facet, value)])
+         for row_filter_facet, row_filter_value, facet, value, count in rows),
+        key=lambda row: (row[0], -row[2], row[1])
+    )
+    return _grouped(rows)
+
+
+def _count_rows(queryset):
+    rows = []
+    for facet in FACET_FIELDS:
+        rows += [
+            (facet, str(row[facet]).strip(), row['count'])
+            for row in queryset.order_by().values(facet).annotate(count=Count('id')).order_by('-count', facet)
+            if row[facet] is not None and str(row[facet]).strip()
+        ]
+    return rows
+
+
+def count_facets(queryset):
+    """GROUP BY counts over an already filtered Alumni queryset"""
+    return _grouped(_count_rows(queryset))
+
+
+def _cache_key(filters):
+    normalized = sorted((name, str(value).strip().lower()) for name, value in filters.items())
+    return 'facet_counts:' + hashlib.sha1(json.dumps(normalized).encode()).hexdigest()
+
+
+def filtered_facet_counts(filters, viewer=None):
+    """Counts per facet value over the directory listing for ``filters``.
+
+    For the filters facet_counts() cannot answer (free text, several
+    selections). The GROUP BY runs over every matching active alumni and is
+    cached for FACET_CACHE_TIMEOUT; the ``viewer``, left out of their own
+    listing, is then taken off the counts if they match the filters.
+    """
+    key = _cache_key(filters)
+    rows = cache.get(key)
+    if rows is None:
+        # One extra value per facet: the viewer lowers at most one value per
+        # facet by one, which can only promote the next one into the top list
+        kept = Counter()
+        rows = []
+        for row in _count_rows(filter_directory(Alumni.objects.filter(is_active=True), filters)):
+            if kept[row[0]] <= FACET_LIMIT:
+                kept[row[0]] += 1
+                rows.append(row)
+        cache.set(key, rows, FACET_CACHE_TIMEOUT)
+    own = facet_values(viewer)
+    if own and filter_directory(Alumni.objects.filter(id=viewer.id, is_active=True), filters).exists():
+        rows = sorted(
+            ((facet, value, count - (own.get(facet) == value)) for facet, value, count in rows),
+            key=lambda row: (-row[2], row[1])
+        )
+    return _grouped(rows)
+
+
+def expected_counts():
+    counts = Counter()
+    for alumni in Alumni.objects.filter(is_active=True).only('is_active', *FACET_FIELDS).iterator():
+        counts.update(_keys(facet_values(alumni)))
+    return counts
+
+
+def reconcile_facets():
+    """Rewrite rows that drifted from the Alumni table; returns (fixed, created, deleted)"""
+    expected = expected_counts()
+    fixed = deleted = 0
+    with transaction.atomic():
+        for row in FacetCount.objects.all().iterator():
+            key = (row.filter_facet, row.filter_value, row.facet, row.value)
+            count = expected.pop(key, 0)
+            if count <= 0:
+                row.delete()
+                deleted += 1
+            elif row.count != count:
+                FacetCount.objects.filter(id=row.id).update(count=count)
+                fixed += 1
+        FacetCount.objects.bulk_create([
+            FacetCount(count=count, **_lookup(key)) for key, count in expected.items()
+        ], batch_size=1000)
+    return fixed, len(expected), deleted
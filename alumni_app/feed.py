@@ -0,0 +1,39 @@
+from datetime import datetime
+
+from django.db.models import Q
+
+POST_PAGE_SIZE = 12
+
+
+def encode_post_cursor(post):
+    return f"{post.created_at.isoformat()}_{post.id}"
+
+
+def decode_post_cursor(cursor):
+    """Parse a (created_at, id) cursor; raises ValueError if it is malformed"""
+    created_at, post_id = cursor.rsplit('_', 1)
+    return datetime.fromisoformat(created_at), int(post_id)
+
+
+def older_than(queryset, before, id_field='id'):
+    """Order newest first and keep only rows after a cursor, on (created_at, id_field)"""
+    queryset = queryset.order_by('-created_at', f'-{id_field}')
+    if before is None:
+        return queryset
+    created_at, post_id = decode_post_cursor(before)
+    # The redundant upper bound lets SQLite seek the index instead of scanning from the top
+    return queryset.filter(
+        Q(created_at__lte=created_at),
+        Q(created_at__lt=created_at) | Q(**{f'{id_field}__lt': post_id})
+    )
+
+
+def post_page(queryset, before=None, limit=POST_PAGE_SIZE):
+    """Return (posts, next_cursor) for one page of a feed, newest first.
+
+    ``before`` is a cursor from a previous page; each page is a range scan of
+    ``limit + 1`` rows on (created_at, id) however far back it starts.
+    """
+    page = list(older_than(queryset, before)[:limit + 1])
+    next_cursor = encode_post_cursor(page[limit - 1]) if len(page) > limit else None
+    return page[:limit], next_cursor
@@ -0,0 +1,89 @@
+import threading
+from collections import OrderedDict
+
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from .images import awaiting_processing
+
+POST_CARD_CACHE_SIZE = 2000
+# Placeholder in a cached card where the viewer's Edit/Delete controls go
+CONTROLS_MARKER = '<!--post-controls-->'
+
+
+class FragmentCache:
+    """Thread-safe LRU of rendered fragments with hit/miss/eviction counters.
+
+    Each entry stores the version it was rendered for; a lookup with a different
+    version is a miss, so a stale entry is never served even if invalidation
+    happened in another process.
+    """
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = 0
+
+    def get(self, key, version):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            return None
+
+    def set(self, key, version, value):
+        with self._lock:
+            self._entries[key] = (version, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else None,
+            }
+
+
+post_cards = FragmentCache(POST_CARD_CACHE_SIZE)
+
+
+def _post_version(post):
+    # The author's name is part of the card, so a profile edit also re-renders it;
+    # the image worker swaps the image and its placeholder without touching
+    # updated_at, so the job state (batch-loaded by the view) is part of it too
+    return (
+        post.updated_at, post.author.first_name, post.author.last_name,
+        post.image.name, awaiting_processing(post.image),
+    )
+
+
+def render_post_card(post, request=None):
+    """A post card with the viewer's controls overlaid on the shared cached markup"""
+    html = post_cards.get(post.id, _post_version(post))
+    if html is None:
+        html = render_to_string('alumni_app/_post_card.html', {'post': post, 'controls_marker': CONTROLS_MARKER})
+        post_cards.set(post.id, _post_version(post), html)
+    controls = ''
+    if request is not None and post.author_id == request.session.get('alumni_id'):
+        controls = render_to_string('alumni_app/_post_controls.html', {'post': post}, request=request)
+    return mark_safe(html.replace(CONTROLS_MARKER, controls, 1))
+
+
+def invalidate_post_card(post_id):
+    post_cards.invalidate(post_id)
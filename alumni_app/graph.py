@@ -0,0 +1,182 @@
+import threading
+import time
+
+import numpy as np
+
+from .models import Alumni, Connection
+
+# Rebuild the in-process graph from the database at least this often (seconds)
+GRAPH_MAX_AGE = 600
+# Deepest connection degree shown on profiles ("3rd-degree connection")
+MAX_DEGREE = 3
+
+
+def _codes(values):
+    """Map attribute values to integer codes; blank values get -1 so they never match"""
+    normalized = [value.strip().lower() if isinstance(value, str) else value for value in values]
+    lookup = {}
+    codes = np.full(len(values), -1, dtype=np.int32)
+    for i, value in enumerate(normalized):
+        if value not in (None, ''):
+            codes[i] = lookup.setdefault(value, len(lookup))
+    return codes
+
+
+class ConnectionGraph:
+    """Integer-indexed view of the active alumni and their accepted connections.
+
+    Each alumni is a row; ``neighbors[row]`` is a sorted int32 array of connected rows,
+    so mutual-connection counts for a row are one bincount over its neighbors' arrays
+    and a BFS level is one concatenation over the frontier's arrays.
+    """
+
+    def __init__(self, ids, graduation_years, industries, locations, edges, pending):
+        self.ids = np.asarray(ids, dtype=np.int64)
+        self.index = {alumni_id: row for row, alumni_id in enumerate(ids)}
+        self.graduation_years = _codes(graduation_years)
+        self.industries = _codes(industries)
+        self.locations = _codes(locations)
+        self.neighbors = self._adjacency(edges)
+        self.pending = self._adjacency(pending)
+        self.built_at = time.monotonic()
+
+    @classmethod
+    def from_database(cls):
+        rows = list(
+            Alumni.objects.filter(is_active=True).order_by('id').values_list(
+                'id', 'graduation_year', 'industry', 'location'
+            )
+        )
+        ids = [row[0] for row in rows]
+        edges = Connection.objects.filter(status='accepted').values_list('sender_id', 'receiver_id')
+        pending = Connection.objects.filter(status='pending').values_list('sender_id', 'receiver_id')
+        return cls(
+            ids,
+            [row[1] for row in rows],
+            [row[2] for row in rows],
+            [row[3] for row in rows],
+            list(edges),
+            list(pending),
+        )
+
+    def _adjacency(self, pairs):
+        rows = [(self.index[a], self.index[b]) for a, b in pairs if a in self.index and b in self.index]
+        adjacency = [np.empty(0, dtype=np.int32) for _ in range(len(self.ids))]
+        if not rows:
+            return adjacency
+        pairs = np.array(rows, dtype=np.int32)
+        # Undirected: store both directions, then split by source row
+        sources = np.concatenate([pairs[:, 0], pairs[:, 1]])
+        targets = np.concatenate([pairs[:, 1], pairs[:, 0]])
+        order = np.lexsort((targets, sources))
+        sources, targets = sources[order], targets[order]
+        bounds = np.searchsorted(sources, np.arange(len(self.ids) + 1))
+        for row in range(len(self.ids)):
+            adjacency[row] = np.unique(targets[bounds[row]:bounds[row + 1]])
+        return adjacency
+
+    def set_link(self, adjacency, alumni_id, other_id, linked):
+        """Add or remove an undirected link in ``neighbors`` or ``pending``"""
+        a, b = self.index.get(alumni_id), self.index.get(other_id)
+        if a is None or b is None:
+            return
+        update = np.union1d if linked else np.setdiff1d
+        adjacency[a] = update(adjacency[a], [b]).astype(np.int32)
+        adjacency[b] = update(adjacency[b], [a]).astype(np.int32)
+
+    def affected_by(self, alumni_id, other_id):
+        """Alumni whose mutual connections change when the connection between two alumni changes"""
+        affected = {alumni_id, other_id}
+        for endpoint in (alumni_id, other_id):
+            row = self.index.get(endpoint)
+            if row is not None:
+                affected.update(self.ids[self.neighbors[row]].tolist())
+        return affected
+
+    def mutual_counts(self, row):
+        neighbors = self.neighbors[row]
+        if len(neighbors) == 0:
+            return np.zeros(len(self.ids), dtype=np.int64)
+        return np.bincount(np.concatenate([self.neighbors[n] for n in neighbors]), minlength=len(self.ids))
+
+    def _expand(self, frontier, parents):
+        """Visit the unvisited neighbors of a frontier, recording one parent each"""
+        lengths = [len(self.neighbors[row]) for row in frontier]
+        if not sum(lengths):
+            return np.empty(0, dtype=np.int32)
+        reached = np.concatenate([self.neighbors[row] for row in frontier])
+        origins = np.repeat(frontier, lengths)
+        fresh = parents[reached] == -1
+        reached, first = np.unique(reached[fresh], return_index=True)
+        parents[reached] = origins[fresh][first]
+        return reached
+
+    @staticmethod
+    def _walk(parents, row):
+        path = [row]
+        while parents[row] != row:
+            row = parents[row]
+            path.append(row)
+        return path
+
+    def shortest_path(self, alumni_id, other_id, max_depth=MAX_DEGREE):
+        """Return the alumni ids on a shortest path between two alumni, or None.
+
+        Bidirectional BFS: the side with the smaller frontier is expanded each step
+        and the search stops as soon as the two sides meet or ``max_depth`` hops
+        have been explored in total.
+        """
+        source, target = self.index.get(alumni_id), self.index.get(other_id)
+        if source is None or target is None:
+            return None
+        if source == target:
+            return [alumni_id]
+
+        forward = np.full(len(self.ids), -1, dtype=np.int32)
+        backward = np.full(len(self.ids), -1, dtype=np.int32)
+        forward[source], backward[target] = source, target
+        forward_frontier = np.array([source], dtype=np.int32)
+        backward_frontier = np.array([target], dtype=np.int32)
+
+        for _ in range(max_depth):
+            if len(forward_frontier) <= len(backward_frontier):
+                forward_frontier = reached = self._expand(forward_frontier, forward)
+                meeting = reached[backward[reached] != -1]
+            else:
+                backward_frontier = reached = self._expand(backward_frontier, backward)
+                meeting = reached[forward[reached] != -1]
+            if len(meeting):
+                row = int(meeting[0])
+                path = self._walk(forward, row)[::-1] + self._walk(backward, row)[1:]
+                return [int(self.ids[step]) for step in path]
+            if not len(reached):
+                return None
+        return None
+
+
+_graph = None
+_graph_lock = threading.Lock()
+
+
+def get_graph():
+    global _graph
+    with _graph_lock:
+        if _graph is None or time.monotonic() - _graph.built_at > GRAPH_MAX_AGE:
+            _graph = ConnectionGraph.from_database()
+        return _graph
+
+
+def apply_connection(alumni_id, other_id, status):
+    """Apply one connection's new status to the in-process graph and return the graph"""
+    with _graph_lock:
+        graph = _graph
+    if graph is None:
+        return get_graph()
+    graph.set_link(graph.pending, alumni_id, other_id, status == 'pending')
+    graph.set_link(graph.neighbors, alumni_id, other_id, status == 'accepted')
+    return graph
+
+
+def introduction_path(alumni_id, other_id, max_depth=MAX_DEGREE):
+    """Alumni ids from one alumni to another through accepted connections, or None"""
+    return get_graph().shortest_path(alumni_id, other_id, max_depth)
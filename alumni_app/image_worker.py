@@ -0,0 +1,17 @@
+"""Entry points for image worker processes.
+
+Spawned children unpickle these by module path before Django is set up, so
+this module must not import models at import time.
+"""
+
+
+def init_worker():
+    import django
+
+    django.setup()
+
+
+def run_job(job_id):
+    from .jobs import run_image_job
+
+    return run_image_job(job_id)
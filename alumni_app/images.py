@@ -0,0 +1,203 @@
+import io
+import logging
+import posixpath
+
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+logger = logging.getLogger(__name__)
+
+# Square crops for avatars; width-bounded resizes for post images
+PROFILE_WIDTHS = (96, 240, 480)
+POST_WIDTHS = (480, 960)
+WEBP_QUALITY = 80
+JPEG_QUALITY = 82
+ORIGINAL_JPEG_QUALITY = 92
+
+
+def derivative_name(name, width, extension):
+    """Derivatives sit next to the original: profile_pics/a.jpg -> profile_pics/a.w96.webp"""
+    stem, _ = posixpath.splitext(name)
+    return f'{stem}.w{width}.{extension}'
+
+
+def _encode(image, extension, quality):
+    buffer = io.BytesIO()
+    if extension == 'webp':
+        image.save(buffer, 'WEBP', quality=quality, method=4)
+    else:
+        image.convert('RGB').save(buffer, 'JPEG', quality=quality, optimize=True, progressive=True)
+    return buffer.getvalue()
+
+
+def _write(storage, name, data):
+    # Derivatives bypass storage.save(): they belong to their blob and are not reference-counted
+    with storage.open(name, 'wb') as target:
+        target.write(data)
+
+
+def _upright(image):
+    # Bake the EXIF orientation into the pixels so the metadata can be dropped
+    image = ImageOps.exif_transpose(image)
+    if image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if 'transparency' in image.info or image.mode in ('LA', 'PA') else 'RGB')
+    return image
+
+
+# Image.info keys that carry metadata rather than pixels
+METADATA_KEYS = ('exif', 'xmp', 'XML:com.adobe.xmp', 'comment')
+
+
+def strip_metadata(upload):
+    """A metadata-free re-encoding of an image, or the image itself if it has none.
+
+    Encoding is deterministic, so the same picture always strips to the same
+    bytes, and a clean image is never re-encoded (and never loses quality twice).
+    Anything Pillow cannot read is returned unchanged.
+    """
+    if not upload:
+        return upload
+    try:
+        image = Image.open(upload)
+        image.load()
+    except (UnidentifiedImageError, OSError):
+        upload.seek(0)
+        return upload
+    original_format = image.format
+    has_metadata = bool(image.getexif()) or any(key in image.info for key in METADATA_KEYS)
+    if original_format not in ('JPEG', 'PNG', 'WEBP') or not has_metadata:
+        upload.seek(0)
+        return upload
+    image = _upright(image)
+    if original_format == 'JPEG':
+        data = _encode(image, 'jpg', ORIGINAL_JPEG_QUALITY)
+    else:
+        buffer = io.BytesIO()
+        image.save(buffer, original_format)
+        data = buffer.getvalue()
+    return ContentFile(data, name=upload.name)
+
+
+def store_stripped(field_file):
+    """Store the metadata-free copy of a stored image as its own blob.
+
+    Returns the new blob name (holding one reference), or None if the image was
+    already clean. The caller points the row at it and releases the old name.
+    """
+    with field_file.open('rb'):
+        stripped = strip_metadata(field_file)
+    if not isinstance(stripped, ContentFile):
+        return None
+    upload_name = field_file.field.generate_filename(field_file.instance, posixpath.basename(field_file.name))
+    return field_file.storage.save(upload_name, stripped)
+
+
+def process_image(field_file, widths, crop, force=False):
+    """Write the thumbnails and WebP variants of a stored image.
+
+    Returns the widths written. Blobs are named by content, so variants already
+    on disk are reused unless ``force`` is set. A file Pillow cannot read is left
+    without variants.
+    """
+    if not field_file or (not force and available_widths(field_file)):
+        return []
+    storage, name = field_file.storage, field_file.name
+    try:
+        with storage.open(name, 'rb') as source:
+            image = Image.open(source)
+            image.load()
+    except (UnidentifiedImageError, OSError):
+        logger.warning('Could not process image %s', name)
+        return []
+    image = _upright(image)
+
+    written = []
+    for width in widths:
+        if crop:
+            variant = ImageOps.fit(image, (width, width), Image.Resampling.LANCZOS)
+        elif image.width >= width:
+            variant = image.copy()
+            variant.thumbnail((width, width * 4), Image.Resampling.LANCZOS)
+        else:
+            continue
+        _write(storage, derivative_name(name, width, 'webp'), _encode(variant, 'webp', WEBP_QUALITY))
+        _write(storage, derivative_name(name, width, 'jpg'), _encode(variant, 'jpg', JPEG_QUALITY))
+        written.append(width)
+    _widths.pop(name, None)
+    return written
+
+
+def process_profile_pic(alumni, force=False):
+    return process_image(alumni.profile_pic, PROFILE_WIDTHS, crop=True, force=force)
+
+
+def process_post_image(post, force=False):
+    return process_image(post.image, POST_WIDTHS, crop=False, force=force)
+
+
+# Image name -> widths found on disk. An empty result is kept only once no job is
+# pending for the image (Pillow could not read it); while one is, nothing is
+# probed at all, and seeing it pending again drops a stale empty entry.
+_widths = {}
+_WIDTHS_CACHE_SIZE = 4096
+
+
+def forget_widths(field_file):
+    if not _widths.get(field_file.name, True):
+        _widths.pop(field_file.name, None)
+
+
+def available_widths(field_file):
+    """Widths with derivatives on disk; a blob name never changes content, so results can be cached"""
+    if not field_file:
+        return ()
+    widths = _widths.get(field_file.name)
+    if widths is not None:
+        return widths
+    if getattr(field_file, 'image_pending', False):
+        return ()
+    widths = tuple(
+        width for width in sorted(set(PROFILE_WIDTHS + POST_WIDTHS))
+        if field_file.storage.exists(derivative_name(field_file.name, width, 'webp'))
+    )
+    if widths or not awaiting_processing(field_file):
+        if len(_widths) >= _WIDTHS_CACHE_SIZE:
+            _widths.clear()
+        _widths[field_file.name] = widths
+    return widths
+
+
+def awaiting_processing(field_file):
+    """True while an image job for this file is queued or running.
+
+    Until then the stored original may still carry EXIF/GPS metadata, so it must
+    not be handed out. Uses the state recorded by prefetch_image_states() when
+    there is one, else looks it up.
+    """
+    if not field_file:
+        return False
+    if getattr(field_file, 'image_pending', None) is None:
+        from .jobs import prefetch_image_states
+
+        prefetch_image_states([field_file])
+    return field_file.image_pending
+
+
+def variant_url(field_file, width, extension='jpg'):
+    """URL of the smallest variant at least ``width`` wide, else the largest one.
+
+    Without variants the original is used once no job is pending for it (Pillow
+    could not read it); while one is, the URL is empty.
+    """
+    widths = available_widths(field_file)
+    if not widths:
+        return field_file.url if field_file and not awaiting_processing(field_file) else ''
+    chosen = next((w for w in widths if w >= width), widths[-1])
+    return field_file.storage.url(derivative_name(field_file.name, chosen, extension))
+
+
+def variant_srcset(field_file):
+    return ', '.join(
+        f"{field_file.storage.url(derivative_name(field_file.name, width, 'webp'))} {width}w"
+        for width in available_widths(field_file)
+    )
@@ -0,0 +1,174 @@
+from datetime import datetime
+
+from django.db import transaction
+from django.db.models import F, Q
+from django.db.models.functions import Greatest
+
+from .badges import add_unread, read_messages
+from .models import ArchivedMessage, ChatParticipant, ChatRoom, Message
+from .pubsub import chat_channel, get_broker
+
+SNIPPET_LENGTH = 100
+HISTORY_PAGE_SIZE = 50
+
+
+def create_room_states(chat_room, first, second):
+    """Create the inbox rows of a new one-to-one chat room"""
+    ChatParticipant.objects.bulk_create([
+        ChatParticipant(chat_room=chat_room, alumni=first, other_participant=second),
+        ChatParticipant(chat_room=chat_room, alumni=second, other_participant=first),
+    ], ignore_conflicts=True)
+
+
+def get_or_create_direct_room(first, second):
+    """Return the one-to-one room of two alumni, creating it atomically if needed"""
+    low, high = (first, second) if first.id < second.id else (second, first)
+    with transaction.atomic():
+        chat_room, created = ChatRoom.objects.get_or_create(low_alumni=low, high_alumni=high)
+        if created:
+            chat_room.participants.add(low, high)
+            create_room_states(chat_room, low, high)
+    return chat_room
+
+
+def record_message(chat_room, message, count=1):
+    """Update both participants' inbox rows after new messages.
+
+    ``message`` is the newest one; ``count`` is how many were added in total.
+    """
+    snippet = message.content[:SNIPPET_LENGTH]
+    updated = ChatParticipant.objects.filter(chat_room=chat_room, alumni_id=message.sender_id).update(
+        last_message=message,
+        last_message_snippet=snippet,
+        last_read_message_id=Greatest(F('last_read_message_id'), message.id)
+    )
+    updated += ChatParticipant.objects.filter(chat_room=chat_room, alumni_id=message.receiver_id).update(
+        last_message=message,
+        last_message_snippet=snippet,
+        unread_count=F('unread_count') + count
+    )
+    if updated < 2:
+        # A row is missing (room created elsewhere); rows that already exist were updated above
+        ChatParticipant.objects.bulk_create([
+            ChatParticipant(
+                chat_room=chat_room, alumni_id=message.sender_id, other_participant_id=message.receiver_id,
+                last_message=message, last_message_snippet=snippet, last_read_message_id=message.id
+            ),
+            ChatParticipant(
+                chat_room=chat_room, alumni_id=message.receiver_id, other_participant_id=message.sender_id,
+                last_message=message, last_message_snippet=snippet, unread_count=count
+            ),
+        ], ignore_conflicts=True)
+    add_unread([message.receiver_id], messages=count)
+
+
+def publish_messages(chat_room, messages):
+    """Push new messages to websocket subscribers once the transaction commits"""
+    payloads = [
+        {
+            'id': message.id,
+            'sender_id': message.sender_id,
+            'content': message.content,
+            'timestamp': message.timestamp.strftime('%H:%M'),
+            'is_read': False
+        }
+        for message in messages
+    ]
+
+    def publish():
+        broker = get_broker()
+        for payload in payloads:
+            broker.publish(chat_channel(chat_room.id), payload)
+
+    transaction.on_commit(publish)
+
+
+def room_states(chat_room_id, alumni_id):
+    """Return (own, other) participant rows of a room, or (None, None) if the alumni is not in it"""
+    own = other = None
+    for state in ChatParticipant.objects.filter(chat_room_id=chat_room_id).select_related('chat_room', 'other_participant'):
+        if state.alumni_id == alumni_id:
+            own = state
+        else:
+            other = state
+    if own is None:
+        return None, None
+    return own, other
+
+
+def mark_room_read(state, up_to_message_id=None):
+    """Advance a participant's read watermark and clear the unread messages it passes.
+
+    Without an explicit message id the watermark moves to the room's last message
+    and the counter resets. A watermark short of the last message only takes off
+    the received messages it covers, so later ones stay unread. Nothing is
+    written when the watermark would not move.
+    """
+    target = up_to_message_id if up_to_message_id is not None else (state.last_message_id or 0)
+    if state.unread_count == 0 and state.last_read_message_id >= target:
+        return
+    with transaction.atomic():
+        # Re-read so the counters drop by exactly what this call covers
+        current = ChatParticipant.objects.filter(id=state.id).values(
+            'unread_count', 'last_read_message_id', 'last_message_id'
+        ).first()
+        if current is None:
+            return
+        unread, watermark = current['unread_count'], current['last_read_message_id']
+        if target >= (current['last_message_id'] or 0):
+            covered = unread
+        else:
+            covered = min(unread, Message.objects.filter(
+                sender_id=state.other_participant_id, receiver_id=state.alumni_id,
+                id__gt=watermark, id__lte=target
+            ).count())
+        if covered or watermark < target:
+            ChatParticipant.objects.filter(id=state.id).update(
+                unread_count=Greatest(F('unread_count') - covered, 0),
+                last_read_message_id=Greatest(F('last_read_message_id'), target)
+            )
+        if covered:
+            read_messages(state.alumni_id, covered)
+    state.unread_count = unread - covered
+    state.last_read_message_id = max(watermark, target)
+
+
+def is_read_by(other_state, message_id):
+    """Whether the other participant's watermark has passed a message"""
+    return other_state is not None and message_id <= other_state.last_read_message_id
+
+
+def encode_history_cursor(message):
+    return f"{message.timestamp.isoformat()}_{message.id}"
+
+
+def decode_history_cursor(cursor):
+    """Parse a (timestamp, id) cursor; raises ValueError if it is malformed"""
+    timestamp, message_id = cursor.rsplit('_', 1)
+    return datetime.fromisoformat(timestamp), int(message_id)
+
+
+def message_history_page(alumni_id, other_id, cleared_at=None, before=None, limit=HISTORY_PAGE_SIZE):
+    """Return (messages, next_cursor) for one page of a conversation, newest page first.
+
+    Messages are returned oldest-first for display. ``before`` is a cursor from a
+    previous page; ``next_cursor`` is None once the start of the history is reached.
+    Archived messages are all older than the ones still in Message, so a page that
+    runs out of live messages continues into the archive.
+    """
+    conditions = Q(sender_id=alumni_id, receiver_id=other_id) | Q(sender_id=other_id, receiver_id=alumni_id)
+    if cleared_at is not None:
+        conditions &= Q(timestamp__gt=cleared_at)
+    if before is not None:
+        before_timestamp, before_id = decode_history_cursor(before)
+        # The redundant upper bound lets SQLite seek the index instead of scanning from the top
+        conditions &= Q(timestamp__lte=before_timestamp) & (Q(timestamp__lt=before_timestamp) | Q(id__lt=before_id))
+
+    page = list(Message.objects.filter(conditions).order_by('-timestamp', '-id')[:limit + 1])
+    if len(page) <= limit:
+        page += ArchivedMessage.objects.filter(conditions).order_by('-timestamp', '-id')[:limit + 1 - len(page)]
+    has_more = len(page) > limit
+    page = page[:limit]
+    page.reverse()
+    next_cursor = encode_history_cursor(page[0]) if has_more else None
+    return page, next_cursor
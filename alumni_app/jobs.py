@@ -0,0 +1,141 @@
+import logging
+import os
+import time
+import uuid
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from .images import forget_widths, process_post_image, process_profile_pic, store_stripped
+from .models import Alumni, ImageJob, Post
+
+logger = logging.getLogger(__name__)
+
+# Jobs left "running" this long belong to a worker that died
+STALE_AFTER = timedelta(minutes=10)
+
+# kind -> (model, image field, variant writer)
+IMAGE_KINDS = {
+    'profile_pic': (Alumni, 'profile_pic', process_profile_pic),
+    'post_image': (Post, 'image', process_post_image),
+}
+
+
+def available_cores():
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def enqueue_image_job(kind, object_id, force=False):
+    """Queue processing of a freshly stored image; a job already waiting covers it"""
+    job, _ = ImageJob.objects.get_or_create(
+        kind=kind, object_id=object_id, status='pending', defaults={'force': force}
+    )
+    return job
+
+
+def pending_images(keys):
+    """The (kind, object_id) pairs in ``keys`` that still have a job queued or running"""
+    object_ids = defaultdict(list)
+    for kind, object_id in keys:
+        object_ids[kind].append(object_id)
+    pending = set()
+    for kind, ids in object_ids.items():
+        pending.update(
+            (kind, object_id) for object_id in ImageJob.objects.filter(
+                kind=kind, object_id__in=ids, status__in=['pending', 'running']
+            ).values_list('object_id', flat=True)
+        )
+    return pending
+
+
+def image_key(field_file):
+    """(kind, object_id) of the image job that processes a stored file, or None"""
+    instance = getattr(field_file, 'instance', None)
+    for kind, (model, field, _) in IMAGE_KINDS.items():
+        if isinstance(instance, model) and field_file.field.name == field and instance.id is not None:
+            return kind, instance.id
+    return None
+
+
+def prefetch_image_states(field_files):
+    """Record on each file whether its image job is still pending, in one query per kind.
+
+    Listing views call this for the files they render, so awaiting_processing()
+    and the image template filters read the recorded state instead of querying
+    once per image.
+    """
+    files = [field_file for field_file in field_files if field_file]
+    pending = pending_images({image_key(field_file) for field_file in files} - {None})
+    for field_file in files:
+        field_file.image_pending = image_key(field_file) in pending
+        if field_file.image_pending:
+            forget_widths(field_file)
+    return files
+
+
+def claim_jobs(limit):
+    """Mark up to ``limit`` pending jobs as running under a fresh token and return them"""
+    token = uuid.uuid4().hex
+    with transaction.atomic():
+        ids = list(
+            ImageJob.objects.filter(status='pending').order_by('id').values_list('id', flat=True)[:limit]
+        )
+        # The status check makes a job claimed by another worker in the meantime a no-op here
+        ImageJob.objects.filter(id__in=ids, status='pending').update(
+            status='running', worker=token, started_at=timezone.now()
+        )
+    return list(ImageJob.objects.filter(worker=token, status='running').order_by('id'))
+
+
+def requeue_stale_jobs():
+    return ImageJob.objects.filter(
+        status='running', started_at__lt=timezone.now() - STALE_AFTER
+    ).update(status='pending', worker='')
+
+
+def run_image_job(job_id):
+    """Strip metadata and write variants for one job; runs in a worker process.
+
+    Returns (job_id, widths written, milliseconds spent).
+    """
+    started = time.perf_counter()
+    job = ImageJob.objects.get(id=job_id)
+    model, field, write_variants = IMAGE_KINDS[job.kind]
+    instance = model.objects.filter(id=job.object_id).first()
+    widths = []
+    if instance is not None and getattr(instance, field):
+        field_file = getattr(instance, field)
+        previous = field_file.name
+        stripped = store_stripped(field_file)
+        if stripped:
+            # Only repoint the row if the user has not replaced the image meanwhile
+            if model.objects.filter(id=instance.id, **{field: previous}).update(**{field: stripped}):
+                # The original still carries the metadata; stop serving it now
+                field_file.storage.discard(previous)
+                field_file.name = stripped
+            else:
+                field_file.storage.delete(stripped)
+        widths = write_variants(instance, force=job.force)
+    return job_id, widths, int((time.perf_counter() - started) * 1000)
+
+
+def finish_job(job, future):
+    """Record the outcome of a job's future"""
+    error = future.exception()
+    if error is None:
+        _, _, duration_ms = future.result()
+        ImageJob.objects.filter(id=job.id).update(
+            status='done', finished_at=timezone.now(), duration_ms=duration_ms
+        )
+    else:
+        logger.error('Image job %s failed: %s', job.id, error)
+        ImageJob.objects.filter(id=job.id).update(
+            status='failed', finished_at=timezone.now(), error=repr(error)
+        )
+    return error is None
+
@@ -0,0 +1,90 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Min, Q
+from django.utils import timezone
+
+from alumni_app.models import ArchivedMessage, ChatParticipant, ChatRoom, Message
+
+
+class Command(BaseCommand):
+    help = (
+        'Delete messages that every participant has cleared, then move messages older '
+        'than the horizon from Message into ArchivedMessage in chunks.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=180,
+                            help='Archive messages older than this many days (default: 180)')
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help='Rows moved or deleted per transaction (default: 500)')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        purged = self.purge_cleared(batch_size)
+        archived = self.archive_old(timezone.now() - timedelta(days=options['days']), batch_size)
+        self.stdout.write(self.style.SUCCESS(
+            f'Deleted {purged} fully cleared messages, archived {archived} messages.'
+        ))
+
+    def purge_cleared(self, batch_size):
+        """Hard-delete messages hidden from both participants by their ClearedChat watermark"""
+        rooms = ChatRoom.objects.filter(low_alumni__isnull=False).annotate(
+            clears=Count('clearedchat'),
+            cleared_by_both=Min('clearedchat__cleared_at')
+        ).filter(clears=2)
+
+        deleted = 0
+        for room in rooms:
+            pair = (
+                Q(sender_id=room.low_alumni_id, receiver_id=room.high_alumni_id) |
+                Q(sender_id=room.high_alumni_id, receiver_id=room.low_alumni_id)
+            )
+            for model in (Message, ArchivedMessage):
+                deleted += self._delete_in_batches(
+                    model.objects.filter(pair, timestamp__lte=room.cleared_by_both), batch_size
+                )
+        return deleted
+
+    def archive_old(self, cutoff, batch_size):
+        """Move messages older than the cutoff into the archive, one transaction per chunk"""
+        # The newest message of each conversation stays so the inbox can still show it
+        candidates = Message.objects.filter(timestamp__lt=cutoff).exclude(
+            id__in=ChatParticipant.objects.filter(last_message__isnull=False).values('last_message_id')
+        ).order_by('id')
+
+        archived = 0
+        last_id = 0
+        while True:
+            with transaction.atomic():
+                chunk = list(candidates.filter(id__gt=last_id)[:batch_size])
+                if not chunk:
+                    break
+                ArchivedMessage.objects.bulk_create([
+                    ArchivedMessage(
+                        id=message.id,
+                        sender_id=message.sender_id,
+                        receiver_id=message.receiver_id,
+                        content=message.content,
+                        timestamp=message.timestamp,
+                        is_read=message.is_read,
+                        client_key=message.client_key,
+                    )
+                    for message in chunk
+                ], ignore_conflicts=True)
+                Message.objects.filter(id__in=[message.id for message in chunk]).delete()
+            archived += len(chunk)
+            last_id = chunk[-1].id
+            self.stdout.write(f'Archived {archived} messages...')
+        return archived
+
+    def _delete_in_batches(self, queryset, batch_size):
+        deleted = 0
+        while True:
+            ids = list(queryset.values_list('id', flat=True)[:batch_size])
+            if not ids:
+                return deleted
+            with transaction.atomic():
+                queryset.model.objects.filter(id__in=ids).delete()
+            deleted += len(ids)
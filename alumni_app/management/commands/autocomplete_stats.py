@@ -0,0 +1,35 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from alumni_app.autocomplete import AUTOCOMPLETE_FIELDS, build_indexes
+
+
+class Command(BaseCommand):
+    help = 'Build the autocomplete prefix indexes and report their size, build time and lookup latency.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--prefix', action='append', default=[],
+                            help='Prefix to time against every field (repeatable; default: a, sa, sof)')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        indexes = build_indexes()
+        self.stdout.write(f'Built in {(time.perf_counter() - started) * 1000:.1f} ms')
+
+        total = 0
+        prefixes = options['prefix'] or ['a', 'sa', 'sof']
+        for field in AUTOCOMPLETE_FIELDS:
+            index = indexes[field]
+            size = index.nbytes()
+            total += size
+            timings = []
+            for prefix in prefixes:
+                started = time.perf_counter()
+                index.complete(prefix)
+                timings.append((time.perf_counter() - started) * 1000)
+            self.stdout.write(
+                f'  {field}: {len(index.keys)} values, {size / 1024:.1f} KiB, '
+                f'slowest lookup {max(timings):.3f} ms'
+            )
+        self.stdout.write(self.style.SUCCESS(f'Total footprint {total / 1024:.1f} KiB'))
@@ -0,0 +1,57 @@
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from alumni_app.graph import MAX_DEGREE, ConnectionGraph
+
+
+class Command(BaseCommand):
+    help = 'Build a synthetic connection graph in memory and time degrees-of-separation queries on it.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--nodes', type=int, default=100_000,
+                            help='Number of synthetic alumni (default: 100000)')
+        parser.add_argument('--degree', type=int, default=20,
+                            help='Average connections per alumni (default: 20)')
+        parser.add_argument('--queries', type=int, default=1000,
+                            help='Random pairs to look up (default: 1000)')
+        parser.add_argument('--max-depth', type=int, default=MAX_DEGREE,
+                            help=f'Deepest degree searched (default: {MAX_DEGREE})')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = np.random.default_rng(options['seed'])
+        nodes = options['nodes']
+        edge_count = nodes * options['degree'] // 2
+        edges = rng.integers(1, nodes + 1, size=(edge_count, 2))
+        edges = edges[edges[:, 0] != edges[:, 1]].tolist()
+        blank = [None] * nodes
+
+        started = time.perf_counter()
+        graph = ConnectionGraph(list(range(1, nodes + 1)), blank, blank, blank, edges, [])
+        build_seconds = time.perf_counter() - started
+        memory = sum(adjacency.nbytes for adjacency in graph.neighbors)
+        self.stdout.write(
+            f'Built {nodes} nodes / {len(edges)} edges in {build_seconds:.2f}s, '
+            f'adjacency arrays {memory / 1024 / 1024:.1f} MiB'
+        )
+
+        pairs = rng.integers(1, nodes + 1, size=(options['queries'], 2)).tolist()
+        timings = []
+        found = {}
+        for alumni_id, other_id in pairs:
+            started = time.perf_counter()
+            path = graph.shortest_path(alumni_id, other_id, options['max_depth'])
+            timings.append(time.perf_counter() - started)
+            degree = len(path) - 1 if path else None
+            found[degree] = found.get(degree, 0) + 1
+
+        timings = np.array(timings) * 1000
+        self.stdout.write(
+            f'{len(pairs)} queries: median {np.median(timings):.2f} ms, '
+            f'p95 {np.percentile(timings, 95):.2f} ms, max {timings.max():.2f} ms'
+        )
+        for degree in sorted(found, key=lambda d: (d is None, d)):
+            label = f'degree {degree}' if degree is not None else f'beyond {options["max_depth"]}'
+            self.stdout.write(f'  {label}: {found[degree]}')
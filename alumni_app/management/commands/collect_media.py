@@ -0,0 +1,36 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from alumni_app.storage import GC_GRACE, collect_garbage, media_storage, stray_files
+
+
+class Command(BaseCommand):
+    help = 'Recount media blob references and delete blobs (and their variants) that nothing references.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--grace-minutes', type=int, default=int(GC_GRACE.total_seconds() // 60),
+                            help='Keep unreferenced blobs touched more recently than this')
+        parser.add_argument('--stray', action='store_true',
+                            help='Also delete untracked files left in the upload directories')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Report what would be deleted without deleting it')
+
+    def handle(self, *args, **options):
+        recounted, purged, freed = collect_garbage(
+            grace=timedelta(minutes=options['grace_minutes']), dry_run=options['dry_run']
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Corrected {recounted} reference counts, purged {purged} blobs ({freed / 1024:.0f} KB).'
+        ))
+        if options['stray']:
+            stray = stray_files()
+            for name in stray:
+                if not media_storage.exists(name):
+                    # Already purged along with the original it was derived from
+                    continue
+                freed_bytes = media_storage.size(name)
+                if not options['dry_run']:
+                    media_storage.purge(name)
+                self.stdout.write(f'Stray file {name} ({freed_bytes / 1024:.0f} KB)')
+            self.stdout.write(self.style.SUCCESS(f'Removed {len(stray)} stray files.'))
@@ -0,0 +1,73 @@
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.core.management.base import BaseCommand
+from django.db.models import Avg, Max
+from django.utils import timezone
+
+from alumni_app.image_worker import init_worker, run_job
+from alumni_app.jobs import IMAGE_KINDS, available_cores, claim_jobs, finish_job, requeue_stale_jobs
+from alumni_app.models import ImageJob
+
+
+class Command(BaseCommand):
+    help = 'Run queued image jobs (metadata stripping, thumbnails, WebP variants) on a process pool.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=available_cores(),
+                            help='Worker processes (default: available cores)')
+        parser.add_argument('--once', action='store_true',
+                            help='Exit when the queue is empty instead of polling')
+        parser.add_argument('--poll', type=float, default=2.0,
+                            help='Seconds to wait between polls of an empty queue')
+        parser.add_argument('--batch', action='store_true',
+                            help='Queue every existing image for reprocessing, run them all and exit')
+
+    def handle(self, *args, **options):
+        workers = max(1, options['workers'])
+        if options['batch']:
+            queued = self.enqueue_library()
+            self.stdout.write(f'Queued {queued} images.')
+        requeued = requeue_stale_jobs()
+        if requeued:
+            self.stdout.write(f'Requeued {requeued} jobs from a stopped worker.')
+
+        run_started, started = timezone.now(), time.perf_counter()
+        done = failed = 0
+        # Spawned rather than forked children, so no parent DB connection is shared
+        with ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context('spawn'), initializer=init_worker
+        ) as pool:
+            while True:
+                jobs = claim_jobs(workers * 4)
+                if not jobs:
+                    if options['once'] or options['batch']:
+                        break
+                    time.sleep(options['poll'])
+                    continue
+                futures = {pool.submit(run_job, job.id): job for job in jobs}
+                for future in as_completed(futures):
+                    if finish_job(futures[future], future):
+                        done += 1
+                    else:
+                        failed += 1
+
+        elapsed = time.perf_counter() - started
+        timing = ImageJob.objects.filter(status='done', finished_at__gte=run_started).aggregate(
+            mean=Avg('duration_ms'), slowest=Max('duration_ms')
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Ran {done + failed} jobs ({failed} failed) on {workers} workers in {elapsed:.1f}s; '
+            f'mean {timing["mean"] or 0:.0f} ms, slowest {timing["slowest"] or 0} ms per job.'
+        ))
+
+    def enqueue_library(self):
+        jobs = []
+        for kind, (model, field, _) in IMAGE_KINDS.items():
+            object_ids = model.objects.exclude(**{field: ''}).exclude(**{f'{field}__isnull': True}).values_list(
+                'id', flat=True
+            )
+            jobs.extend(ImageJob(kind=kind, object_id=object_id, force=True) for object_id in object_ids)
+        ImageJob.objects.bulk_create(jobs, batch_size=500)
+        return len(jobs)
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from alumni_app.search import rebuild_index, search_available
+
+
+class Command(BaseCommand):
+    help = 'Repopulate the alumni directory full-text index from the Alumni table.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Rows inserted per statement batch (default: 1000)')
+
+    def handle(self, *args, **options):
+        if not search_available():
+            self.stdout.write(self.style.WARNING('Full-text search needs SQLite FTS5; nothing to rebuild.'))
+            return
+        indexed = rebuild_index(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Indexed {indexed} active alumni.'))
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from alumni_app.graph import ConnectionGraph
+from alumni_app.models import ConnectionSuggestion, SuggestionRefresh
+from alumni_app.recommendations import TOP_K, store_suggestions
+
+
+class Command(BaseCommand):
+    help = 'Recompute the "people you may know" table for every active alumni from the connection graph.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top-k', type=int, default=TOP_K,
+                            help=f'Suggestions stored per alumni (default: {TOP_K})')
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help='Alumni written per transaction (default: 500)')
+
+    def handle(self, *args, **options):
+        built_at = timezone.now()
+        graph = ConnectionGraph.from_database()
+        alumni_ids = graph.ids.tolist()
+        # Inactive alumni keep no suggestions
+        ConnectionSuggestion.objects.exclude(alumni_id__in=alumni_ids).delete()
+
+        stored = 0
+        batch_size = options['batch_size']
+        for start in range(0, len(alumni_ids), batch_size):
+            stored += store_suggestions(graph, alumni_ids[start:start + batch_size], options['top_k'])
+        # Everyone queued before the graph was read has just been refreshed
+        SuggestionRefresh.objects.filter(queued_at__lte=built_at).delete()
+        self.stdout.write(self.style.SUCCESS(
+            f'Stored {stored} suggestions for {len(alumni_ids)} alumni.'
+        ))
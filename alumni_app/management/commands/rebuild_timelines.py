@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from alumni_app.models import Connection, TimelineEntry
+from alumni_app.timeline import BACKFILL_POSTS, backfill_connection
+
+
+class Command(BaseCommand):
+    help = 'Rebuild every connections-feed timeline from accepted connections and their recent posts.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=BACKFILL_POSTS,
+                            help=f'Recent posts per author copied into each timeline (default: {BACKFILL_POSTS})')
+
+    def handle(self, *args, **options):
+        created = 0
+        with transaction.atomic():
+            TimelineEntry.objects.all().delete()
+            pairs = Connection.objects.filter(status='accepted').values_list('sender_id', 'receiver_id')
+            for sender_id, receiver_id in pairs.iterator():
+                created += backfill_connection(sender_id, receiver_id, options['posts'])
+        self.stdout.write(self.style.SUCCESS(f'Wrote {created} timeline entries.'))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from alumni_app.facets import reconcile_facets
+
+
+class Command(BaseCommand):
+    help = 'Recount directory facet values from the Alumni table and correct any drift in FacetCount.'
+
+    def handle(self, *args, **options):
+        fixed, created, deleted = reconcile_facets()
+        self.stdout.write(self.style.SUCCESS(
+            f'Corrected {fixed} counts, added {created} missing rows, removed {deleted} stale rows.'
+        ))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from alumni_app.badges import reconcile_counters
+
+
+class Command(BaseCommand):
+    help = 'Recount unread notifications and messages from the source tables and correct any drift in UnreadCounter.'
+
+    def handle(self, *args, **options):
+        fixed, created = reconcile_counters()
+        self.stdout.write(self.style.SUCCESS(f'Corrected {fixed} counters, added {created} missing rows.'))
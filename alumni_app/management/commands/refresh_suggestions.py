@@ -0,0 +1,42 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from alumni_app.graph import ConnectionGraph
+from alumni_app.models import SuggestionRefresh
+from alumni_app.recommendations import refresh_queued
+
+
+class Command(BaseCommand):
+    help = 'Recompute the "people you may know" entries queued by connection changes.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help='Alumni refreshed per transaction (default: 500)')
+        parser.add_argument('--once', action='store_true',
+                            help='Exit when the queue is empty instead of polling')
+        parser.add_argument('--poll', type=float, default=5.0,
+                            help='Seconds to wait between polls of an empty queue')
+
+    def handle(self, *args, **options):
+        batch_size = max(1, options['batch_size'])
+        while True:
+            if SuggestionRefresh.objects.exists():
+                started = time.perf_counter()
+                # Web processes only update their own in-process graph, so each
+                # pass reads a fresh one covering everything queued so far
+                built_at = timezone.now()
+                graph = ConnectionGraph.from_database()
+                refreshed = 0
+                while True:
+                    count = refresh_queued(graph, built_at, batch_size)
+                    refreshed += count
+                    if count < batch_size:
+                        break
+                self.stdout.write(self.style.SUCCESS(
+                    f'Refreshed suggestions for {refreshed} alumni in {time.perf_counter() - started:.1f}s.'
+                ))
+            if options['once']:
+                break
+            time.sleep(options['poll'])
@@ -0,0 +1,41 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from alumni_app.broadcasts import BROADCAST_CHUNK, claim_broadcast, requeue_stale_broadcasts, run_broadcast
+
+
+class Command(BaseCommand):
+    help = 'Deliver queued broadcast notifications in chunked INSERT ... SELECT batches.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk', type=int, default=BROADCAST_CHUNK,
+                            help='Recipients per batch')
+        parser.add_argument('--once', action='store_true',
+                            help='Exit when the queue is empty instead of polling')
+        parser.add_argument('--poll', type=float, default=2.0,
+                            help='Seconds to wait between polls of an empty queue')
+
+    def handle(self, *args, **options):
+        requeued = requeue_stale_broadcasts()
+        if requeued:
+            self.stdout.write(f'Requeued {requeued} broadcasts from a stopped worker.')
+
+        while True:
+            broadcast = claim_broadcast()
+            if broadcast is None:
+                if options['once']:
+                    break
+                time.sleep(options['poll'])
+                continue
+            started = time.perf_counter()
+            sent = run_broadcast(
+                broadcast, chunk=max(1, options['chunk']),
+                progress=lambda b: self.stdout.write(f'  broadcast {b.id}: {b.sent}/{b.total}'),
+            )
+            if sent is None:
+                self.stdout.write(self.style.ERROR(f'Broadcast {broadcast.id} failed.'))
+            else:
+                self.stdout.write(self.style.SUCCESS(
+                    f'Broadcast {broadcast.id}: notified {sent} alumni in {time.perf_counter() - started:.1f}s.'
+                ))
@@ -0,0 +1,65 @@
+# Generated by Django 5.2 on 2026-10-18 16:19
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Q
+
+
+def backfill_chat_participants(apps, schema_editor):
+    ChatRoom = apps.get_model('alumni_app', 'ChatRoom')
+    ChatParticipant = apps.get_model('alumni_app', 'ChatParticipant')
+    Message = apps.get_model('alumni_app', 'Message')
+
+    states = []
+    for room in ChatRoom.objects.prefetch_related('participants'):
+        participants = list(room.participants.all())
+        if len(participants) != 2:
+            continue
+        first, second = participants
+        last_message = Message.objects.filter(
+            Q(sender=first, receiver=second) | Q(sender=second, receiver=first)
+        ).order_by('-timestamp', '-id').first()
+        for alumni, other in ((first, second), (second, first)):
+            unread = Message.objects.filter(sender=other, receiver=alumni, is_read=False)
+            first_unread = unread.order_by('id').values_list('id', flat=True).first()
+            if first_unread is not None:
+                last_read_id = first_unread - 1
+            else:
+                last_read_id = last_message.id if last_message else 0
+            states.append(ChatParticipant(
+                chat_room=room,
+                alumni=alumni,
+                other_participant=other,
+                last_message=last_message,
+                last_message_snippet=last_message.content[:100] if last_message else '',
+                unread_count=unread.count(),
+                last_read_message_id=last_read_id,
+            ))
+    ChatParticipant.objects.bulk_create(states, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('alumni_app', '0009_community_communitymember'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChatParticipant',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_message_snippet', models.CharField(blank=True, max_length=100)),
+                ('unread_count', models.PositiveIntegerField(default=0)),
+                ('last_read_message_id', models.BigIntegerField(default=0)),
+                ('alumni', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='chat_states', to='alumni_app.alumni')),
+                ('chat_room', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='participant_states', to='alumni_app.chatroom')),
+                ('last_message', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='alumni_app.message')),
+                ('other_participant', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='alumni_app.alumni')),
+            ],
+            options={
+                'unique_together': {('chat_room', 'alumni')},
+            },
+        ),
+        migrations.RunPython(backfill_chat_participants, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 5.2 on 2026-10-18 16:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def assign_pair_keys(apps, schema_editor):
+    """Key every one-to-one room by its ordered pair, merging duplicate rooms into the oldest"""
+    ChatRoom = apps.get_model('alumni_app', 'ChatRoom')
+    ClearedChat = apps.get_model('alumni_app', 'ClearedChat')
+
+    rooms_by_pair = {}
+    for room in ChatRoom.objects.prefetch_related('participants').order_by('id'):
+        participant_ids = sorted(p.id for p in room.participants.all())
+        if len(participant_ids) == 2:
+            rooms_by_pair.setdefault(tuple(participant_ids), []).append(room)
+
+    for (low_id, high_id), rooms in rooms_by_pair.items():
+        keeper, duplicates = rooms[0], rooms[1:]
+        for duplicate in duplicates:
+            keeper.last_message = max(keeper.last_message, duplicate.last_message)
+            # Keep each participant's most recent clear
+            for cleared in ClearedChat.objects.filter(chat_room=duplicate):
+                existing = ClearedChat.objects.filter(chat_room=keeper, alumni_id=cleared.alumni_id).first()
+                if existing is None:
+                    cleared.chat_room = keeper
+                    cleared.save(update_fields=['chat_room'])
+                elif existing.cleared_at < cleared.cleared_at:
+                    ClearedChat.objects.filter(id=existing.id).update(cleared_at=cleared.cleared_at)
+            # Messages belong to the pair, not the room, so the per-participant rows are identical
+            duplicate.delete()
+        ChatRoom.objects.filter(id=keeper.id).update(
+            low_alumni_id=low_id,
+            high_alumni_id=high_id,
+            last_message=keeper.last_message,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('alumni_app', '0010_chatparticipant'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chatroom',
+            name='low_alumni',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='alumni_app.alumni'),
+        ),
+        migrations.AddField(
+            model_name='chatroom',
+            name='high_alumni',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='alumni_app.alumni'),
+        ),
+        migrations.RunPython(assign_pair_keys, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='chatroom',
+            constraint=models.UniqueConstraint(fields=('low_alumni', 'high_alumni'), name='unique_direct_chat_room'),
+        ),
+    ]
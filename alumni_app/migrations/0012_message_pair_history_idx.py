@@ -0,0 +1,17 @@
+# Generated by Django 5.2 on 2026-10-18 17:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('alumni_app', '0011_chatroom_pair_key'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(fields=['sender', 'receiver', 'timestamp', 'id'], name='message_pair_history_idx'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2 on 2026-10-18 17:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('alumni_app', '0012_message_pair_history_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='message',
+            name='client_key',
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='message',
+            constraint=models.UniqueConstraint(fields=('sender', 'client_key'), name='unique_message_client_key'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2 on 2026-10-18 18:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('alumni_app', '0014_archivedmessage'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ConnectionSuggestion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField()),
+                ('mutual_count', models.PositiveIntegerField(default=0)),
+                ('alumni', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='connection_suggestions', to='alumni_app.alumni')),
+                ('suggested', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='alumni_app.alumni')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['alumni', '-score'], name='suggestion_rank_idx')],
+                'unique_together': {('alumni', 'suggested')},
+            },
+        ),
+    ]
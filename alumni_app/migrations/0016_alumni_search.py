@@ -0,0 +1,36 @@
+# Generated by Django 5.2 on 2026-10-18 19:05
+
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    Alumni = apps.get_model('alumni_app', 'Alumni')
+    columns = ['first_name', 'last_name', 'profession', 'company', 'industry', 'location', 'degree', 'bio']
+    schema_editor.execute(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS alumni_search USING fts5("
+        + ', '.join(columns)
+        + ", tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+    )
+    for alumni in Alumni.objects.filter(is_active=True):
+        schema_editor.execute(
+            f"INSERT INTO alumni_search (rowid, {', '.join(columns)}) VALUES ({', '.join(['%s'] * (len(columns) + 1))})",
+            [alumni.id] + [getattr(alumni, column) or '' for column in columns]
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute('DROP TABLE IF EXISTS alumni_search')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('alumni_app', '0015_connectionsuggestion'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 5.2 on 2026-10-18 19:30
+
+from collections import Counter
+
+from django.db import migrations, models
+
+FACET_FIELDS = ['profession', 'industry', 'location', 'graduation_year', 'degree']
+
+
+def populate_facet_counts(apps, schema_editor):
+    Alumni = apps.get_model('alumni_app', 'Alumni')
+    FacetCount = apps.get_model('alumni_app', 'FacetCount')
+    counts = Counter()
+    for row in Alumni.objects.filter(is_active=True).values_list(*FACET_FIELDS):
+        values = {
+            facet: str(value).strip()[:100]
+            for facet, value in zip(FACET_FIELDS, row) if value is not None and str(value).strip()
+        }
+        for facet, value in values.items():
+            counts[('', '', facet, value)] += 1
+            for filter_facet, filter_value in values.items():
+                if filter_facet != facet:
+                    counts[(filter_facet, filter_value, facet, value)] += 1
+    FacetCount.objects.bulk_create([
+        FacetCount(filter_facet=key[0], filter_value=key[1], facet=key[2], value=key[3], count=count)
+        for key, count in counts.items()
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('alumni_app', '0016_alumni_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FacetCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('facet', models.CharField(max_length=20)),
+                ('value', models.CharField(max_length=100)),
+                ('filter_facet', models.CharField(blank=True, default='', max_length=20)),
+                ('filter_value', models.CharField(blank=True, default='', max_length=100)),
+                ('count', models.IntegerField(default=0)),
+            ],
+            options={
+                'unique_together': {('filter_facet', 'filter_value', 'facet', 'value')},
+            },
+        ),
+        migrations.RunPython(populate_facet_counts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2 on 2026-10-18 19:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('alumni_app', '0017_facetcount'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='alumni',
+            index=models.Index(fields=['last_name', 'first_name', 'id'], name='alumni_directory_idx'),
+        ),
+    ]
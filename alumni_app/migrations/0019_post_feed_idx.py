@@ -0,0 +1,17 @@
+# Generated by Django 5.2 on 2026-10-18 20:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('alumni_app', '0018_alumni_directory_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['created_at', 'id'], name='post_feed_idx'),
+        ),
+    ]
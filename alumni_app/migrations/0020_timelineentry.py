@@ -0,0 +1,28 @@
+# Generated by Django 5.2 on 2026-10-18 21:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('alumni_app', '0019_post_feed_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TimelineEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField()),
+                ('alumni', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='timeline_entries', to='alumni_app.alumni')),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='alumni_app.alumni')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='alumni_app.post')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['alumni', 'created_at', 'post'], name='timeline_feed_idx')],
+                'unique_together': {('alumni', 'post')},
+            },
+        ),
+    ]
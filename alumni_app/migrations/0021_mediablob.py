@@ -0,0 +1,105 @@
+# Generated by Django 5.2 on 2026-10-18 16:40
+
+import hashlib
+import os
+import posixpath
+import shutil
+from collections import Counter
+
+import alumni_app.storage
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def _blob_name(name, path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as source:
+        for chunk in iter(lambda: source.read(64 * 1024), b''):
+            digest.update(chunk)
+    digest = digest.hexdigest()
+    extension = posixpath.splitext(name)[1].lower()
+    return posixpath.join(posixpath.dirname(name), digest[:2], f'{digest}{extension}')
+
+
+def _link(source, target):
+    """Give ``source`` a second name at ``target``; identical content already there is kept"""
+    if os.path.exists(target):
+        return
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    try:
+        os.link(source, target)
+    except OSError:
+        shutil.copyfile(source, target)
+
+
+def adopt_existing_files(apps, schema_editor):
+    """Point referenced uploads at content-hash names and count the references.
+
+    Files are only linked under their new names, never moved or deleted, so a
+    failure that rolls back the rows leaves every old name on disk. The old
+    files are untracked afterwards; ``collect_media --stray`` removes them.
+    """
+    MediaBlob = apps.get_model('alumni_app', 'MediaBlob')
+    references = Counter()
+    sizes = {}
+    for model_name, field_name in (('Alumni', 'profile_pic'), ('Post', 'image')):
+        model = apps.get_model('alumni_app', model_name)
+        storage = model._meta.get_field(field_name).storage
+        names = set(
+            model.objects.exclude(**{field_name: ''}).exclude(**{f'{field_name}__isnull': True})
+            .values_list(field_name, flat=True)
+        )
+        for name in names:
+            path = storage.path(name)
+            if not os.path.exists(path):
+                continue
+            new_name = _blob_name(name, path)
+            rows = model.objects.filter(**{field_name: name})
+            references[new_name] += rows.count()
+            if new_name != name:
+                # Carry over derivatives (<stem>.w<width>.<ext>) written for the old name
+                directory, stem = os.path.split(os.path.splitext(path)[0])
+                new_stem = os.path.splitext(storage.path(new_name))[0]
+                for entry in os.listdir(directory):
+                    if entry.startswith(stem + '.w'):
+                        _link(os.path.join(directory, entry), new_stem + entry[len(stem):])
+                _link(path, storage.path(new_name))
+                rows.update(**{field_name: new_name})
+            sizes[new_name] = os.path.getsize(storage.path(new_name))
+
+    now = timezone.now()
+    MediaBlob.objects.bulk_create([
+        MediaBlob(name=name, size=sizes[name], refcount=count, touched_at=now)
+        for name, count in references.items()
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('alumni_app', '0020_timelineentry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MediaBlob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True)),
+                ('size', models.BigIntegerField(default=0)),
+                ('refcount', models.PositiveIntegerField(default=0)),
+                ('touched_at', models.DateTimeField()),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='alumni',
+            name='profile_pic',
+            field=models.ImageField(blank=True, null=True, storage=alumni_app.storage.ContentAddressedStorage(), upload_to='profile_pics/'),
+        ),
+        migrations.AlterField(
+            model_name='post',
+            name='image',
+            field=models.ImageField(blank=True, null=True, storage=alumni_app.storage.ContentAddressedStorage(), upload_to='post_images/'),
+        ),
+        migrations.RunPython(adopt_existing_files, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2 on 2026-10-18 18:05
+
+from collections import Counter
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def populate_unread_counters(apps, schema_editor):
+    Notification = apps.get_model('alumni_app', 'Notification')
+    ChatParticipant = apps.get_model('alumni_app', 'ChatParticipant')
+    UnreadCounter = apps.get_model('alumni_app', 'UnreadCounter')
+    notifications = Counter(dict(
+        Notification.objects.filter(is_read=False).values('alumni_id')
+        .annotate(total=models.Count('id')).values_list('alumni_id', 'total')
+    ))
+    messages = Counter(dict(
+        ChatParticipant.objects.filter(unread_count__gt=0).values('alumni_id')
+        .annotate(total=models.Sum('unread_count')).values_list('alumni_id', 'total')
+    ))
+    UnreadCounter.objects.bulk_create([
+        UnreadCounter(alumni_id=alumni_id, notifications=notifications[alumni_id], messages=messages[alumni_id])
+        for alumni_id in set(notifications) | set(messages)
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('alumni_app', '0023_broadcast'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UnreadCounter',
+            fields=[
+                ('alumni', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='unread_counter', serialize=False, to='alumni_app.alumni')),
+                ('notifications', models.PositiveIntegerField(default=0)),
+                ('messages', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(populate_unread_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2 on 2026-10-18 19:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('alumni_app', '0024_unreadcounter'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SuggestionRefresh',
+            fields=[
+                ('alumni', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='+', serialize=False, to='alumni_app.alumni')),
+                ('queued_at', models.DateTimeField(db_index=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2 on 2026-10-18 20:40
+
+from django.db import migrations
+
+IMAGE_FIELDS = [
+    ('profile_pic', 'Alumni', 'profile_pic'),
+    ('post_image', 'Post', 'image'),
+]
+
+
+def queue_legacy_images(apps, schema_editor):
+    """Queue a job for every stored image that predates the image job queue.
+
+    Uploads adopted by 0021_mediablob never went through process_image_jobs, so
+    their variants may be missing; the worker fills in whatever is absent.
+    """
+    ImageJob = apps.get_model('alumni_app', 'ImageJob')
+    for kind, model_name, field in IMAGE_FIELDS:
+        model = apps.get_model('alumni_app', model_name)
+        queued = set(ImageJob.objects.filter(kind=kind).values_list('object_id', flat=True))
+        object_ids = model.objects.exclude(**{field: ''}).exclude(**{f'{field}__isnull': True}).values_list('id', flat=True)
+        ImageJob.objects.bulk_create([
+            ImageJob(kind=kind, object_id=object_id)
+            for object_id in object_ids.iterator() if object_id not in queued
+        ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('alumni_app', '0025_suggestionrefresh'),
+    ]
+
+    operations = [
+        migrations.RunPython(queue_legacy_images, migrations.RunPython.noop),
+    ]
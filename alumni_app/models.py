@@ -1,5 +1,7 @@
 from django.db import models
 
+from .storage import media_storage
+
 # Create your models here.
 
 
@@ -16,11 +18,16 @@ class Alumni(models.Model):
     industry = models.CharField(max_length=100)
     location = models.CharField(max_length=100)
     bio = models.TextField(blank=True)
-    profile_pic = models.ImageField(upload_to='profile_pics/', blank=True, null=True)
+    profile_pic = models.ImageField(upload_to='profile_pics/', storage=media_storage, blank=True, null=True)
     is_active = models.BooleanField(default=True)
     is_admin = models.BooleanField(default=False)
     date_joined = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['last_name', 'first_name', 'id'], name='alumni_directory_idx'),
+        ]
+
     def __str__(self):
         return self.username
 
@@ -43,6 +50,15 @@ class Notification(models.Model):
     def __str__(self):
         return f"Notification for {self.alumni.username}"
 
+class UnreadCounter(models.Model):
+    """Unread notifications and messages of one alumnus, maintained on write by alumni_app.badges"""
+    alumni = models.OneToOneField(Alumni, on_delete=models.CASCADE, primary_key=True, related_name='unread_counter')
+    notifications = models.PositiveIntegerField(default=0)
+    messages = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.alumni.username}: {self.notifications} notifications, {self.messages} messages"
+
 class Feedback(models.Model):
     alumni = models.ForeignKey(Alumni, on_delete=models.CASCADE)
     message = models.TextField()
@@ -65,6 +81,41 @@ class Event(models.Model):
     def __str__(self):
         return self.title
 
+class Broadcast(models.Model):
+    """One notification for a whole audience, fanned out in chunks by alumni_app.broadcasts"""
+    AUDIENCE_CHOICES = [
+        ('active', 'All active alumni'),
+    ]
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+    message = models.CharField(max_length=255)
+    audience = models.CharField(max_length=20, choices=AUDIENCE_CHOICES, default='active')
+    event = models.ForeignKey(Event, on_delete=models.SET_NULL, null=True, blank=True, related_name='broadcasts')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    worker = models.CharField(max_length=64, blank=True)
+    total = models.PositiveIntegerField(default=0)
+    sent = models.PositiveIntegerField(default=0)
+    # Highest alumni id already notified; an interrupted fan-out resumes after it
+    last_alumni_id = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    # Last checkpoint; a running broadcast that stops advancing is requeued
+    checkpoint_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'id'], name='broadcast_queue_idx'),
+        ]
+
+    def __str__(self):
+        return f"Broadcast to {self.audience}: {self.message} ({self.status})"
+
 class Connection(models.Model):
     STATUS_CHOICES = [
         ('pending', 'Pending'),
@@ -84,36 +135,180 @@ class Connection(models.Model):
     def __str__(self):
         return f"{self.sender.username} -> {self.receiver.username} ({self.status})"
 
+class ConnectionSuggestion(models.Model):
+    """Precomputed "people you may know" entries, rebuilt by alumni_app.recommendations"""
+    alumni = models.ForeignKey(Alumni, on_delete=models.CASCADE, related_name='connection_suggestions')
+    suggested = models.ForeignKey(Alumni, on_delete=models.CASCADE, related_name='+')
+    score = models.FloatField()
+    mutual_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ['alumni', 'suggested']
+        indexes = [
+            models.Index(fields=['alumni', '-score'], name='suggestion_rank_idx'),
+        ]
+
+    def __str__(self):
+        return f"Suggest {self.suggested.username} to {self.alumni.username}"
+
+class SuggestionRefresh(models.Model):
+    """An alumnus whose suggestions are stale, queued for the refresh_suggestions worker"""
+    alumni = models.OneToOneField(Alumni, on_delete=models.CASCADE, primary_key=True, related_name='+')
+    queued_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return f"Refresh suggestions of {self.alumni_id}"
+
+class FacetCount(models.Model):
+    """Active alumni per directory facet value, maintained by alumni_app.facets.
+
+    Rows with a blank ``filter_facet`` are overall counts; the others count the
+    alumni that also have ``filter_value`` in ``filter_facet``.
+    """
+    facet = models.CharField(max_length=20)
+    value = models.CharField(max_length=100)
+    filter_facet = models.CharField(max_length=20, blank=True, default='')
+    filter_value = models.CharField(max_length=100, blank=True, default='')
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ['filter_facet', 'filter_value', 'facet', 'value']
+
+    def __str__(self):
+        return f"{self.facet}={self.value} ({self.count})"
+
+class MediaBlob(models.Model):
+    """One stored upload, named by its content hash, maintained by alumni_app.storage"""
+    name = models.CharField(max_length=255, unique=True)
+    size = models.BigIntegerField(default=0)
+    # Rows of Alumni.profile_pic and Post.image that point at this blob
+    refcount = models.PositiveIntegerField(default=0)
+    touched_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.name} ({self.refcount} refs)"
+
+class ImageJob(models.Model):
+    """Queued post-upload processing of one image, run by the process_image_jobs worker"""
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+    KIND_CHOICES = [
+        ('profile_pic', 'Profile picture'),
+        ('post_image', 'Post image'),
+    ]
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    object_id = models.PositiveIntegerField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    # Regenerate variants even if they already exist
+    force = models.BooleanField(default=False)
+    worker = models.CharField(max_length=64, blank=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    # Time spent processing in the worker, excluding time in the queue
+    duration_ms = models.PositiveIntegerField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'id'], name='image_job_queue_idx'),
+            models.Index(fields=['kind', 'object_id'], name='image_job_object_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} {self.object_id} ({self.status})"
+
 class Post(models.Model):
     author = models.ForeignKey(Alumni, on_delete=models.CASCADE, related_name='posts')
     content = models.TextField()
-    image = models.ImageField(upload_to='post_images/', blank=True, null=True)
+    image = models.ImageField(upload_to='post_images/', storage=media_storage, blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     is_active = models.BooleanField(default=True)
 
+    class Meta:
+        indexes = [
+            # Partial rather than leading on is_active: Django emits a bare
+            # "WHERE is_active" on SQLite, which cannot seek a composite index
+            models.Index(fields=['created_at', 'id'], condition=models.Q(is_active=True), name='post_feed_idx'),
+        ]
+
     def __str__(self):
         return f"Post by {self.author.username} - {self.created_at}"
 
+class TimelineEntry(models.Model):
+    """A post materialized into one reader's connections feed, maintained by alumni_app.timeline"""
+    alumni = models.ForeignKey(Alumni, on_delete=models.CASCADE, related_name='timeline_entries')
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='+')
+    author = models.ForeignKey(Alumni, on_delete=models.CASCADE, related_name='+')
+    # Copy of post.created_at so a page is a range scan of this table alone
+    created_at = models.DateTimeField()
+
+    class Meta:
+        unique_together = ['alumni', 'post']
+        indexes = [
+            models.Index(fields=['alumni', 'created_at', 'post'], name='timeline_feed_idx'),
+        ]
+
+    def __str__(self):
+        return f"Post {self.post_id} in {self.alumni.username}'s timeline"
+
 class Message(models.Model):
     sender = models.ForeignKey(Alumni, on_delete=models.CASCADE, related_name='sent_messages')
     receiver = models.ForeignKey(Alumni, on_delete=models.CASCADE, related_name='received_messages')
     content = models.TextField()
     timestamp = models.DateTimeField(auto_now_add=True)
     is_read = models.BooleanField(default=False)
+    # Client-generated idempotency key so retried sends are not stored twice
+    client_key = models.CharField(max_length=64, null=True, blank=True)
 
     class Meta:
         ordering = ['timestamp']
+        indexes = [
+            # Keyset pagination over one direction of a conversation
+            models.Index(fields=['sender', 'receiver', 'timestamp', 'id'], name='message_pair_history_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['sender', 'client_key'], name='unique_message_client_key'),
+        ]
+
+
+
+class ArchivedMessage(models.Model):
+    """Old messages moved out of Message by the archive_messages command, keeping their original ids"""
+    id = models.BigIntegerField(primary_key=True)
+    sender = models.ForeignKey(Alumni, on_delete=models.CASCADE, related_name='+')
+    receiver = models.ForeignKey(Alumni, on_delete=models.CASCADE, related_name='+')
+    content = models.TextField()
+    timestamp = models.DateTimeField()
+    is_read = models.BooleanField(default=False)
+    client_key = models.CharField(max_length=64, null=True, blank=True)
+    archived_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        ordering = ['timestamp']
+        indexes = [
+            models.Index(fields=['sender', 'receiver', 'timestamp', 'id'], name='archived_pair_history_idx'),
+        ]
 
 
 class ChatRoom(models.Model):
     participants = models.ManyToManyField(Alumni, related_name='chat_rooms')
+    # Canonical ordered pair for one-to-one rooms (low id first), unique so lookup is one index probe
+    low_alumni = models.ForeignKey(Alumni, on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+    high_alumni = models.ForeignKey(Alumni, on_delete=models.CASCADE, null=True, blank=True, related_name='+')
     created_at = models.DateTimeField(auto_now_add=True)
     last_message = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['-last_message']
+        constraints = [
+            models.UniqueConstraint(fields=['low_alumni', 'high_alumni'], name='unique_direct_chat_room'),
+        ]
 
     def __str__(self):
         return f"Chat Room {self.id}"
@@ -127,4 +322,21 @@ class ClearedChat(models.Model):
         unique_together = ['alumni', 'chat_room']
 
     def __str__(self):
-        return f"{self.alumni.username} cleared chat {self.chat_room.id}"
\ No newline at end of file
+        return f"{self.alumni.username} cleared chat {self.chat_room.id}"
+
+
+class ChatParticipant(models.Model):
+    """Per-participant summary of a chat room, kept up to date on write so the inbox is a single query"""
+    chat_room = models.ForeignKey(ChatRoom, on_delete=models.CASCADE, related_name='participant_states')
+    alumni = models.ForeignKey(Alumni, on_delete=models.CASCADE, related_name='chat_states')
+    other_participant = models.ForeignKey(Alumni, on_delete=models.CASCADE, null=True, related_name='+')
+    last_message = models.ForeignKey(Message, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    last_message_snippet = models.CharField(max_length=100, blank=True)
+    unread_count = models.PositiveIntegerField(default=0)
+    last_read_message_id = models.BigIntegerField(default=0)
+
+    class Meta:
+        unique_together = ['chat_room', 'alumni']
+
+    def __str__(self):
+        return f"{self.alumni.username} in chat {self.chat_room.id}"
@@ -0,0 +1,76 @@
+import asyncio
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+class BaseBroker:
+    """Interface for the chat pub/sub layer.
+
+    Subscribers live on an asyncio event loop (the websocket handlers), while
+    publishers are usually synchronous views running in a worker thread, so
+    implementations must be safe to publish from any thread.
+    """
+
+    def subscribe(self, channel):
+        """Register the caller and return an asyncio.Queue that receives messages"""
+        raise NotImplementedError
+
+    def unsubscribe(self, channel, queue):
+        raise NotImplementedError
+
+    def publish(self, channel, message):
+        raise NotImplementedError
+
+
+class LocalBroker(BaseBroker):
+    """In-process broker, only reaches subscribers inside the same worker process"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = defaultdict(set)
+
+    def subscribe(self, channel):
+        queue = asyncio.Queue()
+        with self._lock:
+            self._subscribers[channel].add((asyncio.get_running_loop(), queue))
+        return queue
+
+    def unsubscribe(self, channel, queue):
+        with self._lock:
+            subscribers = self._subscribers.get(channel)
+            if not subscribers:
+                return
+            subscribers.difference_update({entry for entry in subscribers if entry[1] is queue})
+            if not subscribers:
+                del self._subscribers[channel]
+
+    def publish(self, channel, message):
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, ()))
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, message)
+            except RuntimeError:
+                # The subscriber's loop has already shut down
+                self.unsubscribe(channel, queue)
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    """Return the process-wide broker configured by settings.CHAT_BROKER"""
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                _broker = import_string(getattr(settings, 'CHAT_BROKER', 'alumni_app.pubsub.LocalBroker'))()
+    return _broker
+
+
+def chat_channel(room_id):
+    return f'chat.{room_id}'
@@ -0,0 +1,105 @@
+import asyncio
+import json
+import re
+from importlib import import_module
+from urllib.parse import urlsplit
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http.cookie import parse_cookie
+
+from .inbox import mark_room_read, room_states
+from .models import ChatRoom
+from .pubsub import chat_channel, get_broker
+
+CHAT_PATH = re.compile(r'^/ws/chat/(?P<room_id>\d+)/$')
+
+
+def _headers(scope):
+    return {name.decode('latin1').lower(): value.decode('latin1') for name, value in scope.get('headers', [])}
+
+
+@sync_to_async
+def _authorize(session_key, room_id):
+    """Return (alumni_id, other_participant_id) for a member of the room, otherwise None"""
+    if not session_key:
+        return None
+    session = import_module(settings.SESSION_ENGINE).SessionStore(session_key)
+    alumni_id = session.get('alumni_id')
+    if not alumni_id or session.get('is_admin'):
+        return None
+
+    participant_ids = list(
+        ChatRoom.participants.through.objects.filter(chatroom_id=room_id).values_list('alumni_id', flat=True)
+    )
+    if alumni_id not in participant_ids:
+        return None
+    return alumni_id, next((pid for pid in participant_ids if pid != alumni_id), None)
+
+
+@sync_to_async
+def _mark_read(room_id, alumni_id, message_id):
+    own_state, _ = room_states(room_id, alumni_id)
+    if own_state is not None:
+        mark_room_read(own_state, message_id)
+
+
+async def chat_socket(scope, receive, send, room_id):
+    """Push new messages of one chat room to a connected participant"""
+    event = await receive()
+    if event['type'] != 'websocket.connect':
+        return
+
+    headers = _headers(scope)
+    # Sessions authenticate the socket, so refuse cross-site handshakes
+    origin = headers.get('origin')
+    if origin and urlsplit(origin).netloc != headers.get('host'):
+        await send({'type': 'websocket.close', 'code': 4003})
+        return
+
+    cookies = parse_cookie(headers.get('cookie', ''))
+    membership = await _authorize(cookies.get(settings.SESSION_COOKIE_NAME), room_id)
+    if membership is None:
+        await send({'type': 'websocket.close', 'code': 4003})
+        return
+    alumni_id, other_id = membership
+
+    broker = get_broker()
+    channel = chat_channel(room_id)
+    queue = broker.subscribe(channel)
+    await send({'type': 'websocket.accept'})
+
+    receive_task = asyncio.ensure_future(receive())
+    queue_task = asyncio.ensure_future(queue.get())
+    try:
+        while True:
+            done, _ = await asyncio.wait({receive_task, queue_task}, return_when=asyncio.FIRST_COMPLETED)
+
+            if receive_task in done:
+                if receive_task.result()['type'] == 'websocket.disconnect':
+                    break
+                # Clients only listen; ignore anything they send
+                receive_task = asyncio.ensure_future(receive())
+
+            if queue_task in done:
+                message = queue_task.result()
+                mine = message['sender_id'] == alumni_id
+                if not mine and message['sender_id'] == other_id:
+                    # The receiver has the chat open, so the message is read on delivery
+                    await _mark_read(room_id, alumni_id, message['id'])
+                    message = dict(message, is_read=True)
+                await send({'type': 'websocket.send', 'text': json.dumps(dict(message, mine=mine))})
+                queue_task = asyncio.ensure_future(queue.get())
+    finally:
+        broker.unsubscribe(channel, queue)
+        receive_task.cancel()
+        queue_task.cancel()
+
+
+async def websocket_application(scope, receive, send):
+    match = CHAT_PATH.match(scope['path'])
+    if match is None:
+        await receive()
+        await send({'type': 'websocket.close', 'code': 4004})
+        return
+    await chat_socket(scope, receive, send, int(match.group('room_id')))
@@ -0,0 +1,101 @@
+import numpy as np
+from django.db import transaction
+from django.utils import timezone
+
+from .graph import apply_connection
+from .models import ConnectionSuggestion, SuggestionRefresh
+
+TOP_K = 10
+
+MUTUAL_WEIGHT = 1.0
+GRADUATION_YEAR_WEIGHT = 0.5
+INDUSTRY_WEIGHT = 0.3
+LOCATION_WEIGHT = 0.3
+
+
+def top_k(graph, alumni_id, k=TOP_K):
+    """Return [(alumni_id, score, mutual_count), ...] best first"""
+    row = graph.index.get(alumni_id)
+    if row is None or len(graph.ids) < 2:
+        return []
+
+    mutual = graph.mutual_counts(row)
+    scores = (
+        MUTUAL_WEIGHT * mutual
+        + GRADUATION_YEAR_WEIGHT * ((graph.graduation_years == graph.graduation_years[row]) & (graph.graduation_years[row] >= 0))
+        + INDUSTRY_WEIGHT * ((graph.industries == graph.industries[row]) & (graph.industries[row] >= 0))
+        + LOCATION_WEIGHT * ((graph.locations == graph.locations[row]) & (graph.locations[row] >= 0))
+    )
+    # Never suggest yourself, existing connections or open requests
+    scores[row] = 0
+    scores[graph.neighbors[row]] = 0
+    scores[graph.pending[row]] = 0
+
+    k = min(k, len(scores))
+    best = np.argpartition(-scores, k - 1)[:k]
+    best = best[np.argsort(-scores[best], kind='stable')]
+    return [
+        (int(graph.ids[i]), float(scores[i]), int(mutual[i]))
+        for i in best if scores[i] > 0
+    ]
+
+
+def store_suggestions(graph, alumni_ids, k=TOP_K):
+    """Recompute and replace the precomputed suggestions of the given alumni"""
+    rows = [
+        ConnectionSuggestion(alumni_id=alumni_id, suggested_id=suggested_id, score=score, mutual_count=mutual)
+        for alumni_id in alumni_ids
+        for suggested_id, score, mutual in top_k(graph, alumni_id, k)
+    ]
+    with transaction.atomic():
+        ConnectionSuggestion.objects.filter(alumni_id__in=alumni_ids).delete()
+        ConnectionSuggestion.objects.bulk_create(rows)
+    return len(rows)
+
+
+def queue_refresh(alumni_ids):
+    """Mark alumni whose suggestions are stale; alumni already queued stay queued once"""
+    now = timezone.now()
+    SuggestionRefresh.objects.bulk_create(
+        [SuggestionRefresh(alumni_id=alumni_id, queued_at=now) for alumni_id in alumni_ids],
+        update_conflicts=True, unique_fields=['alumni'], update_fields=['queued_at'], batch_size=1000,
+    )
+
+
+def refresh_queued(graph, queued_before, limit):
+    """Recompute the suggestions of up to ``limit`` alumni queued before the graph was built.
+
+    Returns how many were refreshed. Alumni queued later (or again) wait for a
+    pass with a newer graph.
+    """
+    alumni_ids = list(
+        SuggestionRefresh.objects.filter(queued_at__lte=queued_before)
+        .order_by('queued_at').values_list('alumni_id', flat=True)[:limit]
+    )
+    if alumni_ids:
+        store_suggestions(graph, alumni_ids)
+        SuggestionRefresh.objects.filter(alumni_id__in=alumni_ids, queued_at__lte=queued_before).delete()
+    return len(alumni_ids)
+
+
+def connection_changed(alumni_id, other_id, status):
+    """Apply one connection's new status to the graph and refresh the suggestions it affects.
+
+    The two alumni are refreshed in the request. An accepted connection also
+    changes the mutual counts of everyone connected to either side, which can
+    be thousands of alumni; those are queued for refresh_suggestions instead.
+    """
+    graph = apply_connection(alumni_id, other_id, status)
+    store_suggestions(graph, [alumni_id, other_id])
+    if status == 'accepted':
+        queue_refresh(graph.affected_by(alumni_id, other_id) - {alumni_id, other_id})
+
+
+def suggestions_for(alumni_id, k=TOP_K):
+    """Serve suggestions from the precomputed table"""
+    return [
+        suggestion.suggested
+        for suggestion in ConnectionSuggestion.objects.filter(
+            alumni_id=alumni_id, suggested__is_active=True
+        ).select_related('suggested').order_by('-score')[:k]
+    ]
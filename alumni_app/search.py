@@ -0,0 +1,107 @@
+import re
+
+from django.db import connection
+from django.db.models.expressions import RawSQL
+
+from .models import Alumni
+
+SEARCH_TABLE = 'alumni_search'
+SEARCH_COLUMNS = ['first_name', 'last_name', 'profession', 'company', 'industry', 'location', 'degree', 'bio']
+# bm25 weight per column, in SEARCH_COLUMNS order: name matches rank above bio matches
+SEARCH_WEIGHTS = [10.0, 10.0, 4.0, 3.0, 2.0, 2.0, 2.0, 1.0]
+SEARCH_LIMIT = 500
+
+_TERM = re.compile(r'\w+', re.UNICODE)
+
+
+def search_available():
+    """The FTS5 index only exists on SQLite; other backends keep the LIKE filters"""
+    return connection.vendor == 'sqlite'
+
+
+def _match_terms(text, column=None):
+    """Turn free text into FTS5 prefix terms, quoted so user input is never parsed as syntax"""
+    terms = [f'"{term}"*' for term in _TERM.findall(text)]
+    if column:
+        return [f'{column} : {term}' for term in terms]
+    return terms
+
+
+def match_expression(query='', profession='', location=''):
+    """FTS5 MATCH expression requiring every term; empty when there is nothing to match"""
+    terms = _match_terms(query) + _match_terms(profession, 'profession') + _match_terms(location, 'location')
+    return ' AND '.join(terms)
+
+
+def matching_ids(query='', profession='', location=''):
+    """Subquery of all matching alumni ids, for filtering a queryset ordered some other way"""
+    return RawSQL(
+        f'SELECT rowid FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s',
+        [match_expression(query, profession, location)]
+    )
+
+
+def ranked_matches(query='', profession='', location='', after=None, limit=SEARCH_LIMIT):
+    """Return [(alumni_id, score), ...] of active alumni matching every term, best match first.
+
+    Scores are weighted bm25, lower is better. ``after`` is a (score, alumni_id)
+    key from a previous call; matches resume right after it.
+    """
+    expression = match_expression(query, profession, location)
+    if not expression:
+        return []
+    weights = ', '.join(str(weight) for weight in SEARCH_WEIGHTS)
+    sql = (
+        f'SELECT rowid, score FROM (SELECT rowid, bm25({SEARCH_TABLE}, {weights}) AS score '
+        f'FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s)'
+    )
+    params = [expression]
+    if after is not None:
+        sql += ' WHERE score > %s OR (score = %s AND rowid > %s)'
+        params += [after[0], after[0], after[1]]
+    with connection.cursor() as cursor:
+        cursor.execute(sql + ' ORDER BY score, rowid LIMIT %s', params + [limit])
+        return [(row[0], row[1]) for row in cursor.fetchall()]
+
+
+def _row(alumni):
+    return [alumni.id] + [getattr(alumni, column) or '' for column in SEARCH_COLUMNS]
+
+
+def index_alumni(alumni):
+    """Add, refresh or drop one alumni's search row to match its current state"""
+    if not search_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {SEARCH_TABLE} WHERE rowid = %s', [alumni.id])
+        if alumni.is_active:
+            cursor.execute(
+                f'INSERT INTO {SEARCH_TABLE} (rowid, {", ".join(SEARCH_COLUMNS)}) '
+                f'VALUES ({", ".join(["%s"] * (len(SEARCH_COLUMNS) + 1))})',
+                _row(alumni)
+            )
+
+
+def rebuild_index(batch_size=1000):
+    """Repopulate the whole index from the Alumni table; returns the number of rows indexed"""
+    if not search_available():
+        return 0
+    insert = (
+        f'INSERT INTO {SEARCH_TABLE} (rowid, {", ".join(SEARCH_COLUMNS)}) '
+        f'VALUES ({", ".join(["%s"] * (len(SEARCH_COLUMNS) + 1))})'
+    )
+    indexed = 0
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {SEARCH_TABLE}')
+        batch = []
+        for alumni in Alumni.objects.filter(is_active=True).only('id', *SEARCH_COLUMNS).iterator(chunk_size=batch_size):
+            batch.append(_row(alumni))
+            if len(batch) >= batch_size:
+                cursor.executemany(insert, batch)
+                indexed += len(batch)
+                batch = []
+        if batch:
+            cursor.executemany(insert, batch)
+            indexed += len(batch)
+        cursor.execute(f"INSERT INTO {SEARCH_TABLE} ({SEARCH_TABLE}) VALUES ('optimize')")
+    return indexed
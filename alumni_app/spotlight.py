@@ -0,0 +1,73 @@
+import random
+import threading
+import time
+from array import array
+
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+
+from .jobs import prefetch_image_states
+from .models import Alumni
+
+SPOTLIGHT_SIZE = 4
+# The landing page caches the rendered spotlight for this long (seconds)
+SPOTLIGHT_FRAGMENT_TTL = 60
+# The pool of eligible ids is re-read from the database at least this often
+SPOTLIGHT_POOL_MAX_AGE = 600
+
+_VERSION_KEY = 'spotlight_pool_version'
+
+_pool = array('q')
+_pool_version = None
+_pool_built_at = 0
+_lock = threading.Lock()
+
+
+def _current_version():
+    version = cache.get(_VERSION_KEY)
+    if version is None:
+        version = time.time_ns()
+        cache.add(_VERSION_KEY, version, None)
+        version = cache.get(_VERSION_KEY, version)
+    return version
+
+
+def _eligible_ids():
+    return Alumni.objects.filter(
+        is_active=True, profile_pic__isnull=False
+    ).exclude(profile_pic='').order_by().values_list('id', flat=True).iterator()
+
+
+def spotlight_pool():
+    """Ids of active alumni with a profile picture, rebuilt when stale or invalidated"""
+    global _pool, _pool_version, _pool_built_at
+    version = _current_version()
+    with _lock:
+        if _pool_version != version or time.monotonic() - _pool_built_at > SPOTLIGHT_POOL_MAX_AGE:
+            _pool = array('q', _eligible_ids())
+            _pool_version = version
+            _pool_built_at = time.monotonic()
+        return _pool
+
+
+def spotlight_alumni(k=SPOTLIGHT_SIZE):
+    """Pick k random alumni from the pool by index, then load just those rows"""
+    pool = spotlight_pool()
+    ids = [pool[i] for i in random.sample(range(len(pool)), min(k, len(pool)))]
+    alumni = Alumni.objects.in_bulk(ids)
+    # Rows deactivated since the pool was built are skipped until the next refresh
+    featured = [alumni[pk] for pk in ids if pk in alumni and alumni[pk].is_active]
+    prefetch_image_states([featured_alumni.profile_pic for featured_alumni in featured])
+    return featured
+
+
+def invalidate_spotlight():
+    """Drop the pool and the cached fragment, e.g. after a picture change.
+
+    Both live in the configured cache. With the default per-process
+    local-memory cache only this process sees the change; others keep their
+    pool for up to SPOTLIGHT_POOL_MAX_AGE and their fragment for up to
+    SPOTLIGHT_FRAGMENT_TTL. A shared cache backend reaches every process.
+    """
+    cache.set(_VERSION_KEY, time.time_ns(), None)
+    cache.delete(make_template_fragment_key('spotlight'))
@@ -0,0 +1,37 @@
+// Typeahead for inputs marked with data-autocomplete="<field>": suggestions
+// come from the autocomplete endpoint and are offered through a <datalist>.
+(function() {
+    const DELAY = 150;
+
+    document.querySelectorAll('input[data-autocomplete]').forEach(input => {
+        const url = input.dataset.autocompleteUrl;
+        const list = document.createElement('datalist');
+        list.id = input.id ? input.id + '-suggestions' : 'suggestions-' + Math.random().toString(36).slice(2);
+        input.after(list);
+        input.setAttribute('list', list.id);
+        input.setAttribute('autocomplete', 'off');
+
+        let timer = null;
+        let lastQuery = '';
+        input.addEventListener('input', () => {
+            clearTimeout(timer);
+            timer = setTimeout(() => {
+                const query = input.value.trim();
+                if (!query || query === lastQuery) return;
+                lastQuery = query;
+                const params = new URLSearchParams({ field: input.dataset.autocomplete, q: query });
+                fetch(url + '?' + params.toString())
+                    .then(response => response.json())
+                    .then(data => {
+                        if (data.status !== 'success' || input.value.trim() !== query) return;
+                        list.replaceChildren(...data.results.map(value => {
+                            const option = document.createElement('option');
+                            option.value = value;
+                            return option;
+                        }));
+                    })
+                    .catch(error => console.error('Autocomplete error:', error));
+            }, DELAY);
+        });
+    });
+})();
@@ -0,0 +1,44 @@
+// Placeholders for uploads still being processed by the image worker: poll the
+// image status endpoint and swap each one for its <img> once it is ready.
+(function() {
+    const INTERVAL = 2000;
+    const MAX_POLLS = 30;
+
+    const placeholders = Array.from(document.querySelectorAll('[data-image-pending]'));
+    if (!placeholders.length) return;
+    const url = placeholders[0].dataset.imageStatusUrl;
+    let polls = 0;
+
+    function swap(placeholder, image) {
+        const img = document.createElement('img');
+        img.src = image.src;
+        if (image.srcset) {
+            img.srcset = image.srcset;
+            img.sizes = placeholder.dataset.imageSizes;
+        }
+        img.className = placeholder.dataset.imageClass;
+        img.setAttribute('style', placeholder.dataset.imageStyle);
+        img.alt = placeholder.dataset.imageAlt;
+        placeholder.replaceWith(img);
+    }
+
+    function poll() {
+        const waiting = placeholders.filter(placeholder => placeholder.isConnected);
+        if (!waiting.length || polls++ >= MAX_POLLS) return;
+        const params = new URLSearchParams();
+        waiting.forEach(placeholder => params.append('image', placeholder.dataset.imagePending));
+        fetch(url + '?' + params.toString())
+            .then(response => response.json())
+            .then(data => {
+                if (data.status !== 'success') return;
+                waiting.forEach(placeholder => {
+                    const image = data.images[placeholder.dataset.imagePending];
+                    if (image && image.ready && image.src) swap(placeholder, image);
+                });
+            })
+            .catch(error => console.error('Error checking images:', error))
+            .finally(() => setTimeout(poll, INTERVAL));
+    }
+
+    setTimeout(poll, INTERVAL);
+})();
@@ -0,0 +1,28 @@
+// Nav badges for unread notifications and messages, refreshed from the badge
+// counter endpoint while the page is visible.
+(function() {
+    const INTERVAL = 30000;
+
+    const url = document.currentScript.dataset.badgesUrl;
+    const badges = document.querySelectorAll('[data-unread-badge]');
+    if (!url || !badges.length) return;
+
+    function refresh() {
+        if (document.hidden) return;
+        fetch(url)
+            .then(response => response.json())
+            .then(data => {
+                if (data.status !== 'success') return;
+                badges.forEach(badge => {
+                    const count = data[badge.dataset.unreadBadge] || 0;
+                    badge.textContent = count > 99 ? '99+' : count;
+                    badge.classList.toggle('d-none', count === 0);
+                });
+            })
+            .catch(error => console.error('Error loading unread counts:', error));
+    }
+
+    refresh();
+    setInterval(refresh, INTERVAL);
+    document.addEventListener('visibilitychange', refresh);
+})();
@@ -0,0 +1,186 @@
+import hashlib
+import os
+import posixpath
+import re
+import uuid
+from collections import Counter
+from datetime import timedelta
+
+from django.core.files.storage import FileSystemStorage
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.deconstruct import deconstructible
+
+# Unreferenced blobs younger than this are kept: an upload is stored before the
+# row that references it is saved
+GC_GRACE = timedelta(hours=1)
+
+
+# A blob: <dir>/<xx>/<sha256>.<ext>. Its derivatives (<sha256>.w<width>.<ext>) are
+# not matched, since process_image_jobs --batch regenerates them in place
+IMMUTABLE_NAME_RE = re.compile(r'^[\w-]+/[0-9a-f]{2}/[0-9a-f]{64}\.\w+$')
+
+
+def is_immutable(name):
+    """Content-addressed originals never change content, so clients may cache them forever"""
+    return bool(IMMUTABLE_NAME_RE.match(name))
+
+
+def blob_name(name, digest):
+    """profile_pics/photo.JPG with digest ab12... -> profile_pics/ab/ab12....jpg"""
+    directory = posixpath.dirname(name)
+    extension = posixpath.splitext(name)[1].lower()
+    return posixpath.join(directory, digest[:2], f'{digest}{extension}')
+
+
+def content_digest(content):
+    digest = hashlib.sha256()
+    for chunk in content.chunks():
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """Stores uploads under the SHA-256 of their bytes, one copy per distinct file.
+
+    Every save takes a reference on the blob in MediaBlob and every delete gives
+    one back; saving content that already exists writes nothing. Files are only
+    removed by ``collect_garbage`` once nothing references them.
+    """
+
+    def get_available_name(self, name, max_length=None):
+        # The final name comes from the content in _save; an existing name is a hit, not a clash
+        return name
+
+    def _save(self, name, content):
+        name = blob_name(name, content_digest(content))
+        if not self.exists(name):
+            # Write a private copy and link it into place, so a blob only ever
+            # appears complete and the link fails if an identical upload got there first
+            temporary = super()._save(posixpath.join(posixpath.dirname(name), f'.{uuid.uuid4().hex}.tmp'), content)
+            try:
+                os.link(self.path(temporary), self.path(name))
+            except FileExistsError:
+                pass
+            finally:
+                os.remove(self.path(temporary))
+        self.retain(name, content.size)
+        return name
+
+    def retain(self, name, size=0):
+        from .models import MediaBlob
+
+        now = timezone.now()
+        if not MediaBlob.objects.filter(name=name).update(refcount=F('refcount') + 1, touched_at=now):
+            blob, created = MediaBlob.objects.get_or_create(
+                name=name, defaults={'size': size, 'refcount': 1, 'touched_at': now}
+            )
+            if not created:
+                MediaBlob.objects.filter(id=blob.id).update(refcount=F('refcount') + 1, touched_at=now)
+
+    def delete(self, name):
+        """Release one reference; the bytes stay on disk until garbage collection"""
+        from .models import MediaBlob
+
+        if name:
+            MediaBlob.objects.filter(name=name, refcount__gt=0).update(
+                refcount=F('refcount') - 1, touched_at=timezone.now()
+            )
+
+    def discard(self, name):
+        """Release one reference and remove the blob at once if it was the last.
+
+        For content that must stop being served, such as an original superseded
+        by its metadata-free copy, rather than wait for garbage collection.
+        """
+        from .models import MediaBlob
+
+        self.delete(name)
+        if name and MediaBlob.objects.filter(name=name, refcount=0).delete()[0]:
+            self.purge(name)
+
+    def purge(self, name):
+        """Remove a blob and the derivatives written next to it (same hash stem)"""
+        directory, filename = posixpath.split(name)
+        stem = posixpath.splitext(filename)[0]
+        if self.exists(directory):
+            for entry in self.listdir(directory)[1]:
+                if entry == filename or entry.startswith(stem + '.'):
+                    super().delete(posixpath.join(directory, entry))
+
+
+media_storage = ContentAddressedStorage()
+
+
+def referenced_names():
+    """Blob name -> number of rows pointing at it"""
+    from .models import Alumni, Post
+
+    counts = Counter()
+    for model, field in ((Alumni, 'profile_pic'), (Post, 'image')):
+        counts.update(
+            name for name in model.objects.exclude(**{field: ''}).values_list(field, flat=True) if name
+        )
+    return counts
+
+
+def collect_garbage(grace=GC_GRACE, dry_run=False):
+    """Recount references from the tables, then purge blobs nothing uses.
+
+    Returns (recounted, purged, bytes_freed).
+    """
+    from .models import MediaBlob
+
+    expected = referenced_names()
+    recounted = 0
+    with transaction.atomic():
+        for blob in MediaBlob.objects.all().iterator():
+            count = expected.get(blob.name, 0)
+            if blob.refcount != count:
+                if not dry_run:
+                    MediaBlob.objects.filter(id=blob.id).update(refcount=count)
+                recounted += 1
+
+    purged = freed = 0
+    cutoff = timezone.now() - grace
+    for blob in MediaBlob.objects.filter(touched_at__lt=cutoff).iterator():
+        if expected.get(blob.name, 0):
+            continue
+        if not dry_run:
+            # Drop the row first so a blob re-uploaded meanwhile is not purged under it
+            if not MediaBlob.objects.filter(id=blob.id, refcount=0).delete()[0]:
+                continue
+            media_storage.purge(blob.name)
+        purged += 1
+        freed += blob.size
+    return recounted, purged, freed
+
+
+def stray_files():
+    """Files in the upload directories that are not tracked blobs or their derivatives"""
+    from .models import MediaBlob
+
+    stems = {
+        posixpath.splitext(name)[0]
+        for name in MediaBlob.objects.values_list('name', flat=True)
+    }
+    stray = []
+
+    def walk(directory):
+        if not media_storage.exists(directory):
+            return
+        directories, files = media_storage.listdir(directory)
+        for entry in files:
+            path = posixpath.join(directory, entry)
+            # Derivatives are <stem>.w<width>.<ext>, so strip up to two extensions
+            stem = posixpath.splitext(path)[0]
+            if stem not in stems and posixpath.splitext(stem)[0] not in stems:
+                stray.append(path)
+        for entry in directories:
+            walk(posixpath.join(directory, entry))
+
+    for field_directory in ('profile_pics', 'post_images'):
+        walk(field_directory)
+    return stray
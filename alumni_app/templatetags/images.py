@@ -0,0 +1,23 @@
+from django import template
+
+from alumni_app.images import available_widths, awaiting_processing, variant_srcset, variant_url
+
+register = template.Library()
+
+
+@register.filter
+def thumbnail(field_file, width):
+    """Fallback JPEG thumbnail URL for an <img> src"""
+    return variant_url(field_file, int(width))
+
+
+@register.filter
+def srcset(field_file):
+    """WebP candidates for an <img> srcset; empty until derivatives exist"""
+    return variant_srcset(field_file)
+
+
+@register.filter
+def image_ready(field_file):
+    """False while the image worker has not stripped the upload and written its variants"""
+    return bool(available_widths(field_file)) or (bool(field_file) and not awaiting_processing(field_file))
@@ -0,0 +1,10 @@
+from django import template
+
+from alumni_app.fragments import render_post_card
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def post_card(context, post):
+    return render_post_card(post, context.get('request'))
@@ -1,4 +1,378 @@
-from django.test import TestCase
+import importlib
+import json
+import os
+import random
+import shutil
+import tempfile
+from collections import deque
+from datetime import datetime
+from unittest import mock
 
-# Create your tests here.
-        
\ No newline at end of file
+from django.core.cache import cache
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+
+from .badges import unread_counts
+from .directory import DIRECTORY_ORDER, decode_directory_cursor, directory_page, filter_directory
+from .facets import count_facets, facet_counts, facet_values, filtered_facet_counts, reconcile_facets, update_facets
+from .feed import post_page
+from .graph import ConnectionGraph
+from .inbox import get_or_create_direct_room, mark_room_read, message_history_page, record_message, room_states
+from .models import Alumni, ArchivedMessage, ChatParticipant, Connection, FacetCount, Message, Post
+from .search import index_alumni, ranked_matches
+
+
+def make_alumni(username, **fields):
+    values = {
+        'email': f'{username}@example.com', 'password': 'x', 'first_name': username.title(), 'last_name': 'Test',
+        'graduation_year': 2020, 'degree': 'BSc', 'profession': 'Engineer', 'industry': 'Tech', 'location': 'Delhi',
+    }
+    values.update(fields)
+    return Alumni.objects.create(username=username, **values)
+
+
+class AdoptExistingFilesMigrationTests(TransactionTestCase):
+    """0021_mediablob renames legacy uploads to content-hash blobs"""
+
+    before = [('alumni_app', '0020_timelineentry')]
+    after = [('alumni_app', '0021_mediablob')]
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.migrate(self.before)
+        self.addCleanup(self.migrate, MigrationExecutor(connection).loader.graph.leaf_nodes())
+
+        Alumni = MigrationExecutor(connection).loader.project_state(self.before).apps.get_model('alumni_app', 'Alumni')
+        self.write('profile_pics/first.jpg', b'same bytes')
+        self.write('profile_pics/first.w160.jpg', b'thumbnail')
+        self.write('profile_pics/second.jpg', b'same bytes')
+        self.first = self.create_alumni(Alumni, 'first', 'profile_pics/first.jpg')
+        self.second = self.create_alumni(Alumni, 'second', 'profile_pics/second.jpg')
+
+    def migrate(self, targets):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(targets)
+
+    def write(self, name, data):
+        path = os.path.join(self.media_root, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as handle:
+            handle.write(data)
+
+    def create_alumni(self, Alumni, username, profile_pic):
+        return Alumni.objects.create(
+            username=username, email=f'{username}@example.com', password='x', first_name=username,
+            last_name='Test', graduation_year=2020, degree='BSc', profession='Engineer',
+            industry='Tech', location='Delhi', profile_pic=profile_pic,
+        )
+
+    def profile_pics(self, apps):
+        Alumni = apps.get_model('alumni_app', 'Alumni')
+        return dict(Alumni.objects.filter(id__in=[self.first.id, self.second.id]).values_list('username', 'profile_pic'))
+
+    def test_identical_uploads_share_one_blob(self):
+        self.migrate(self.after)
+        apps = MigrationExecutor(connection).loader.project_state(self.after).apps
+
+        names = self.profile_pics(apps)
+        self.assertEqual(names['first'], names['second'])
+        self.assertRegex(names['first'], r'^profile_pics/[0-9a-f]{2}/[0-9a-f]{64}\.jpg$')
+        blob = apps.get_model('alumni_app', 'MediaBlob').objects.get()
+        self.assertEqual((blob.name, blob.refcount, blob.size), (names['first'], 2, len(b'same bytes')))
+
+        stem = os.path.splitext(os.path.join(self.media_root, names['first']))[0]
+        self.assertTrue(os.path.exists(stem + '.w160.jpg'))
+        # The old names stay on disk until collect_media --stray removes them
+        self.assertTrue(os.path.exists(os.path.join(self.media_root, 'profile_pics/first.jpg')))
+        self.assertTrue(os.path.exists(os.path.join(self.media_root, 'profile_pics/second.jpg')))
+
+    def test_failure_leaves_rows_pointing_at_existing_files(self):
+        migration = importlib.import_module('alumni_app.migrations.0021_mediablob')
+        with mock.patch.object(migration, 'timezone') as timezone:
+            timezone.now.side_effect = RuntimeError('interrupted')
+            with self.assertRaises(RuntimeError):
+                self.migrate(self.after)
+
+        apps = MigrationExecutor(connection).loader.project_state(self.before).apps
+        names = self.profile_pics(apps)
+        self.assertEqual(names, {'first': 'profile_pics/first.jpg', 'second': 'profile_pics/second.jpg'})
+        for name in names.values():
+            self.assertTrue(os.path.exists(os.path.join(self.media_root, name)))
+
+
+@override_settings(AUTOCOMPLETE_WARM_UP=False)
+class MessageClientKeyTests(TestCase):
+    """Retried sends with the same client_key are stored once"""
+
+    def setUp(self):
+        cache.clear()
+        self.sender = make_alumni('sender')
+        self.receiver = make_alumni('receiver')
+        self.stranger = make_alumni('stranger')
+        for other in (self.receiver, self.stranger):
+            Connection.objects.create(sender=self.sender, receiver=other, status='accepted')
+        session = self.client.session
+        session['alumni_id'] = self.sender.id
+        session.save()
+
+    def send(self, receiver, client_key):
+        return self.client.post('/send-message/', {'receiver_id': receiver.id, 'content': 'hi', 'client_key': client_key})
+
+    def send_batch(self, receiver, messages):
+        return self.client.post(
+            '/send-message/batch/', json.dumps({'receiver_id': receiver.id, 'messages': messages}),
+            content_type='application/json'
+        )
+
+    def test_retried_send_returns_the_stored_message(self):
+        first = self.send(self.receiver, 'k1').json()
+        second = self.send(self.receiver, 'k1').json()
+        self.assertEqual(first['message']['id'], second['message']['id'])
+        self.assertEqual(Message.objects.filter(client_key='k1').count(), 1)
+        self.assertEqual(ChatParticipant.objects.get(alumni=self.receiver).unread_count, 1)
+
+    def test_key_used_for_another_receiver_is_rejected(self):
+        self.send(self.receiver, 'k1')
+        self.assertEqual(self.send(self.stranger, 'k1').status_code, 409)
+        self.assertEqual(self.send_batch(self.stranger, [{'content': 'hi', 'client_key': 'k1'}]).status_code, 409)
+        self.assertFalse(Message.objects.filter(receiver=self.stranger).exists())
+
+    def test_batch_reports_repeated_and_stored_keys_as_duplicates(self):
+        self.send(self.receiver, 'k0')
+        results = self.send_batch(self.receiver, [
+            {'content': 'a', 'client_key': 'k0'},
+            {'content': 'b', 'client_key': 'k1'},
+            {'content': 'b again', 'client_key': 'k1'},
+            {'content': 'c'},
+        ]).json()['messages']
+        self.assertEqual([result['duplicate'] for result in results], [True, False, True, False])
+        self.assertEqual(results[1]['id'], results[2]['id'])
+        self.assertEqual(Message.objects.filter(sender=self.sender).count(), 3)
+        self.assertEqual(ChatParticipant.objects.get(alumni=self.receiver).unread_count, 3)
+
+    def test_batch_keys_stored_concurrently_are_duplicates(self):
+        stored = Message.objects.create(sender=self.sender, receiver=self.receiver, content='raced', client_key='k2')
+        filter_messages = Message.objects.filter
+        calls = []
+
+        def miss_first_lookup(*args, **kwargs):
+            # The first lookup runs before the concurrent send commits
+            if 'client_key__in' in kwargs and not calls:
+                calls.append(kwargs)
+                return Message.objects.none()
+            return filter_messages(*args, **kwargs)
+
+        with mock.patch.object(Message.objects, 'filter', side_effect=miss_first_lookup):
+            response = self.send_batch(self.receiver, [{'content': 'a', 'client_key': 'k1'}, {'content': 'b', 'client_key': 'k2'}])
+        self.assertEqual(response.status_code, 200)
+        results = response.json()['messages']
+        self.assertEqual([(result['id'] == stored.id, result['duplicate']) for result in results], [(False, False), (True, True)])
+        self.assertEqual(Message.objects.filter(sender=self.sender).count(), 2)
+
+
+class ReadWatermarkTests(TestCase):
+    """mark_room_read only clears the unread messages its watermark passes"""
+
+    def setUp(self):
+        self.sender = make_alumni('sender')
+        self.receiver = make_alumni('receiver')
+        room = get_or_create_direct_room(self.sender, self.receiver)
+        self.message_ids = []
+        for i in range(5):
+            message = Message.objects.create(sender=self.sender, receiver=self.receiver, content=str(i))
+            record_message(room, message)
+            self.message_ids.append(message.id)
+        self.state, _ = room_states(room.id, self.receiver.id)
+
+    def stored(self):
+        return ChatParticipant.objects.filter(id=self.state.id).values_list('unread_count', 'last_read_message_id').get()
+
+    def test_partial_read_keeps_later_messages_unread(self):
+        self.assertEqual(unread_counts(self.receiver.id), (0, 5))
+        mark_room_read(self.state, self.message_ids[2])
+        self.assertEqual(self.stored(), (2, self.message_ids[2]))
+        self.assertEqual(unread_counts(self.receiver.id), (0, 2))
+
+        # A watermark behind the current one changes nothing
+        mark_room_read(self.state, self.message_ids[0])
+        self.assertEqual(self.stored(), (2, self.message_ids[2]))
+
+        mark_room_read(self.state)
+        self.assertEqual(self.stored(), (0, self.message_ids[-1]))
+        self.assertEqual(unread_counts(self.receiver.id), (0, 0))
+
+
+class CursorPaginationTests(TestCase):
+    """Keyset pages visit every row once, in order, including rows that tie on the sort key"""
+
+    def walk(self, fetch):
+        rows, cursor = [], None
+        for _ in range(20):
+            page, cursor = fetch(cursor)
+            rows += page
+            if cursor is None:
+                return rows
+        self.fail('Pagination did not terminate')
+
+    def test_directory(self):
+        for i in range(7):
+            make_alumni(f'alumni{i}', first_name='Ann' if i < 4 else f'Ann{i}', last_name='Smith' if i % 2 else 'Jones')
+
+        def fetch(cursor):
+            after = decode_directory_cursor(cursor)[1] if cursor else None
+            return directory_page(Alumni.objects.all(), {}, after, limit=2)
+
+        self.assertEqual(
+            [alumni.id for alumni in self.walk(fetch)],
+            list(Alumni.objects.order_by(*DIRECTORY_ORDER).values_list('id', flat=True))
+        )
+
+    def test_feed(self):
+        author = make_alumni('author')
+        for i in range(7):
+            Post.objects.create(author=author, content=str(i))
+        Post.objects.filter(id__in=Post.objects.order_by('id').values('id')[:4]).update(created_at=datetime(2024, 1, 1))
+
+        def fetch(cursor):
+            return post_page(Post.objects.filter(is_active=True), cursor, limit=2)
+
+        self.assertEqual(
+            [post.id for post in self.walk(fetch)],
+            list(Post.objects.order_by('-created_at', '-id').values_list('id', flat=True))
+        )
+
+    def test_chat_history_continues_into_the_archive(self):
+        first, second = make_alumni('first'), make_alumni('second')
+        for i in range(7):
+            Message.objects.create(sender=first if i % 2 else second, receiver=second if i % 2 else first, content=str(i))
+        Message.objects.filter(id__in=Message.objects.order_by('id').values('id')[:4]).update(timestamp=datetime(2024, 1, 1))
+        for message in Message.objects.order_by('id')[:3]:
+            ArchivedMessage.objects.create(
+                id=message.id, sender_id=message.sender_id, receiver_id=message.receiver_id,
+                content=message.content, timestamp=message.timestamp
+            )
+            message.delete()
+
+        def fetch(cursor):
+            page, cursor = message_history_page(first.id, second.id, before=cursor, limit=2)
+            return page[::-1], cursor
+
+        expected = sorted(
+            list(Message.objects.values_list('timestamp', 'id')) + list(ArchivedMessage.objects.values_list('timestamp', 'id')),
+            reverse=True
+        )
+        self.assertEqual([message.id for message in self.walk(fetch)], [message_id for _, message_id in expected])
+
+
+class RankedSearchPaginationTests(TestCase):
+    """Text searches page through FTS matches best first"""
+
+    def test_pages_follow_bm25_order(self):
+        for i in range(4):
+            index_alumni(make_alumni(f'name{i}', first_name='Ann', last_name=f'Name{i}'))
+        for i in range(3):
+            index_alumni(make_alumni(f'bio{i}', first_name='Bob', last_name=f'Bio{i}', bio='Grew up in Ann Arbor'))
+        index_alumni(make_alumni('other', first_name='Cara'))
+        filters = {'search': 'ann'}
+
+        rows, cursor = [], None
+        while True:
+            after = decode_directory_cursor(cursor)[1] if cursor else None
+            page, cursor = directory_page(filter_directory(Alumni.objects.all(), filters), filters, after, limit=3)
+            rows += page
+            if cursor is None:
+                break
+
+        self.assertEqual([alumni.id for alumni in rows], [alumni_id for alumni_id, _ in ranked_matches('ann')])
+        self.assertEqual([alumni.first_name for alumni in rows], ['Ann'] * 4 + ['Bob'] * 3)
+
+
+class FacetStoreTests(TestCase):
+    """Counts maintained by update_facets match a direct GROUP BY over the listing"""
+
+    def setUp(self):
+        cache.clear()
+        self.alumni = [
+            make_alumni(f'alumni{i}', industry=['Tech', 'Health', 'Law'][i % 3], degree=['BSc', 'MSc'][i % 2],
+                        location=['Delhi', 'Pune'][i % 2], graduation_year=2018 + i % 4)
+            for i in range(9)
+        ]
+        reconcile_facets()
+
+    def assertMatchesListing(self, selected, viewer):
+        listing = Alumni.objects.filter(is_active=True, **selected).exclude(id=viewer.id)
+        self.assertEqual(facet_counts(selected, exclude=facet_values(viewer)), count_facets(listing))
+
+    def change(self, alumni, **fields):
+        before = facet_values(alumni)
+        for name, value in fields.items():
+            setattr(alumni, name, value)
+        alumni.save()
+        update_facets(before, facet_values(alumni))
+
+    def test_store_follows_profile_changes(self):
+        viewer = self.alumni[0]
+        self.change(self.alumni[1], industry='Tech', location='Goa')
+        self.change(self.alumni[2], is_active=False)
+        self.change(self.alumni[3], industry='Finance')
+        for selected in ({}, {'industry': 'Tech'}, {'degree': 'MSc'}, {'graduation_year': 2019}):
+            self.assertMatchesListing(selected, viewer)
+        self.assertFalse(FacetCount.objects.filter(count__lte=0).exists())
+        self.assertEqual(reconcile_facets(), (0, 0, 0))
+
+    def test_filtered_counts_leave_out_the_viewer(self):
+        filters = {'industry': 'Tech', 'degree': 'MSc'}
+        for viewer in self.alumni[:2]:
+            listing = filter_directory(Alumni.objects.filter(is_active=True).exclude(id=viewer.id), filters)
+            self.assertEqual(filtered_facet_counts(filters, viewer=viewer), count_facets(listing))
+
+
+class ShortestPathTests(SimpleTestCase):
+    """Bidirectional BFS in ConnectionGraph finds paths as short as a plain BFS"""
+
+    def graph(self, ids, edges):
+        blank = [None] * len(ids)
+        return ConnectionGraph(ids, blank, blank, blank, edges, [])
+
+    def test_small_graph(self):
+        graph = self.graph(list(range(1, 8)), [(1, 2), (2, 3), (3, 4), (4, 5), (1, 6), (6, 5)])
+        self.assertEqual(graph.shortest_path(1, 5), [1, 6, 5])
+        self.assertEqual(graph.shortest_path(1, 1), [1])
+        self.assertEqual(len(graph.shortest_path(1, 4)), 4)
+        self.assertIsNone(graph.shortest_path(1, 5, max_depth=1))
+        self.assertIsNone(graph.shortest_path(1, 7))
+        self.assertIsNone(graph.shortest_path(1, 99))
+
+    def test_matches_plain_bfs(self):
+        rng = random.Random(0)
+        ids = list(range(100, 160))
+        edges = {tuple(sorted(rng.sample(ids, 2))) for _ in range(80)}
+        graph = self.graph(ids, sorted(edges))
+        adjacency = {alumni_id: set() for alumni_id in ids}
+        for a, b in edges:
+            adjacency[a].add(b)
+            adjacency[b].add(a)
+
+        for _ in range(200):
+            source, target = rng.sample(ids, 2)
+            distances = {source: 0}
+            queue = deque([source])
+            while queue:
+                row = queue.popleft()
+                for other in adjacency[row]:
+                    if other not in distances:
+                        distances[other] = distances[row] + 1
+                        queue.append(other)
+            path = graph.shortest_path(source, target)
+            if distances.get(target, 99) > 3:
+                self.assertIsNone(path)
+                continue
+            self.assertEqual(len(path) - 1, distances[target])
+            self.assertEqual((path[0], path[-1]), (source, target))
+            self.assertTrue(all(b in adjacency[a] for a, b in zip(path, path[1:])))
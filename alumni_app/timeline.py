@@ -0,0 +1,86 @@
+from collections import Counter
+
+from django.core.cache import cache
+from django.db.models import Count
+
+from .connections import connected_ids
+from .feed import POST_PAGE_SIZE, encode_post_cursor, older_than
+from .models import Connection, Post, TimelineEntry
+
+# Authors with more accepted connections than this are not fanned out on write;
+# their posts are merged into readers' timelines at read time instead
+FANOUT_LIMIT = 1000
+# Recent posts copied into a reader's timeline when a connection is accepted
+BACKFILL_POSTS = 50
+FAN_OUT_ON_READ_CACHE_TIMEOUT = 300
+
+_FAN_OUT_ON_READ_KEY = 'timeline_fan_out_on_read_authors'
+
+
+def fan_out_on_read_authors():
+    """Ids of alumni whose posts are read on demand rather than materialized"""
+    authors = cache.get(_FAN_OUT_ON_READ_KEY)
+    if authors is None:
+        counts = Counter()
+        accepted = Connection.objects.filter(status='accepted')
+        for field in ('sender_id', 'receiver_id'):
+            for alumni_id, total in accepted.values(field).annotate(total=Count('id')).values_list(field, 'total'):
+                counts[alumni_id] += total
+        authors = {alumni_id for alumni_id, total in counts.items() if total > FANOUT_LIMIT}
+        cache.set(_FAN_OUT_ON_READ_KEY, authors, FAN_OUT_ON_READ_CACHE_TIMEOUT)
+    return authors
+
+
+def _entries(post, reader_ids):
+    return [
+        TimelineEntry(alumni_id=reader_id, post_id=post.id, author_id=post.author_id, created_at=post.created_at)
+        for reader_id in reader_ids
+    ]
+
+
+def fan_out_post(post):
+    """Write a new post into every connection's timeline; returns the number of entries"""
+    if post.author_id in fan_out_on_read_authors():
+        return 0
+    entries = _entries(post, connected_ids(post.author_id))
+    TimelineEntry.objects.bulk_create(entries, batch_size=500, ignore_conflicts=True)
+    return len(entries)
+
+
+def retract_post(post):
+    TimelineEntry.objects.filter(post=post).delete()
+
+
+def backfill_connection(alumni_id, other_id, limit=BACKFILL_POSTS):
+    """Copy each side's recent posts into the other's timeline after a connection is accepted"""
+    heavy = fan_out_on_read_authors()
+    entries = []
+    for reader_id, author_id in ((alumni_id, other_id), (other_id, alumni_id)):
+        if author_id in heavy:
+            continue
+        for post in Post.objects.filter(author_id=author_id, is_active=True).order_by('-created_at', '-id')[:limit]:
+            entries += _entries(post, [reader_id])
+    TimelineEntry.objects.bulk_create(entries, batch_size=500, ignore_conflicts=True)
+    return len(entries)
+
+
+def timeline_page(alumni_id, before=None, limit=POST_PAGE_SIZE):
+    """Return (posts, next_cursor) for one page of an alumni's connections feed.
+
+    Materialized entries are one range scan on (alumni, created_at, post); posts of
+    connected fan-out-on-read authors are merged in from the same cursor window.
+    """
+    entries = older_than(
+        TimelineEntry.objects.filter(alumni_id=alumni_id, post__is_active=True).select_related('post__author'),
+        before, id_field='post_id'
+    )
+    candidates = {entry.post_id: entry.post for entry in entries[:limit + 1]}
+
+    heavy = fan_out_on_read_authors() & connected_ids(alumni_id)
+    if heavy:
+        pulled = older_than(Post.objects.filter(author_id__in=heavy, is_active=True).select_related('author'), before)
+        candidates.update((post.id, post) for post in pulled[:limit + 1])
+
+    posts = sorted(candidates.values(), key=lambda post: (post.created_at, post.id), reverse=True)
+    next_cursor = encode_post_cursor(posts[limit - 1]) if len(posts) > limit else None
+    return posts[:limit], next_cursor
@@ -10,8 +10,14 @@ urlpatterns = [
     path('dashboard/', views.alumni_dashboard, name='alumni_dashboard'),
     path('change-password/', views.change_password, name='change_password'),
     path('admin-dashboard/', views.admin_dashboard, name='admin_dashboard'),
+    path('admin-dashboard/alumni/', views.admin_alumni_page, name='admin_alumni_page'),
+    path('admin-dashboard/cache-stats/', views.cache_stats, name='cache_stats'),
+    path('admin-dashboard/broadcasts/', views.broadcast_progress, name='broadcast_progress'),
     path('alumni-gallery/', views.alumni_gallery, name='alumni_gallery'),
+    path('alumni-gallery/page/', views.alumni_gallery_page, name='alumni_gallery_page'),
+    path('autocomplete/', views.autocomplete, name='autocomplete'),
     path('notifications/', views.notifications, name='notifications'),
+    path('notifications/badges/', views.unread_badges, name='unread_badges'),
     path('feedback/', views.submit_feedback, name='feedback'),
     path('resolve-feedback/<int:feedback_id>/', views.resolve_feedback, name='resolve_feedback'),
     path('toggle-alumni/<int:alumni_id>/', views.toggle_alumni_status, name='toggle_alumni_status'),
@@ -28,13 +34,18 @@ urlpatterns = [
     # Post-related URLs
     path('posts/create/', views.create_post, name='create_post'),
     path('posts/', views.view_posts, name='view_posts'),
+    path('posts/feed/', views.posts_feed, name='posts_feed'),
+    path('images/status/', views.image_status, name='image_status'),
     path('posts/delete/<int:post_id>/', views.delete_post, name='delete_post'),
     path('posts/edit/<int:post_id>/', views.edit_post, name='edit_post'),
     path('alumni/profile/<int:alumni_id>/', views.view_alumni_profile, name='view_alumni_profile'),
     path('alumni/edit-profile/', views.edit_profile, name='edit_profile'),
     path('inbox/', views.inbox, name='inbox'),
     path('chat/<int:room_id>/', views.chat_room, name='chat_room'),
+    path('chat/<int:room_id>/messages/', views.chat_messages, name='chat_messages'),
+    path('chat/<int:room_id>/history/', views.chat_history, name='chat_history'),
     path('send-message/', views.send_message, name='send_message'),
+    path('send-message/batch/', views.send_message_batch, name='send_message_batch'),
     path('start-chat/<int:alumni_id>/', views.start_chat, name='start_chat'),
     path('clear-chat/<int:room_id>/', views.clear_chat, name='clear_chat'),
 ]
\ No newline at end of file
@@ -1,15 +1,55 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
-from .models import Alumni, Adminn, Notification, Feedback, Event, Connection, Post, Message, ChatRoom, ClearedChat
+from .models import Alumni, Adminn, Notification, Feedback, Event, Broadcast, Connection, Post, Message, ChatRoom, ClearedChat, ChatParticipant
 from django.utils import timezone
-from django.db import models
+from django.utils.formats import date_format
+from django.utils.functional import SimpleLazyObject
+from django.db import models, transaction, IntegrityError
 from django.views.decorators.cache import never_cache
 from django.contrib.auth.decorators import login_required
-from django.http import JsonResponse
+from django.http import JsonResponse, HttpResponseNotModified, Http404, HttpResponse, FileResponse
+from django.core.exceptions import SuspiciousFileOperation
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from django.views.decorators.http import require_safe
+from ranged_response import RangedFileResponse
 from django.db.models import Q
 from django.core.mail import send_mail
 from django.template.loader import render_to_string
 from django.conf import settings
+from .inbox import (
+    get_or_create_direct_room, record_message, publish_messages, room_states, mark_room_read, is_read_by,
+    message_history_page
+)
+from .connections import connected_ids, are_connected, invalidate_connections
+from .graph import introduction_path
+from .recommendations import connection_changed, suggestions_for
+from .search import index_alumni
+from .directory import (
+    EXACT_FILTERS, decode_directory_cursor, directory_filters, directory_page, filter_directory
+)
+from .autocomplete import (
+    AUTOCOMPLETE_FIELDS, AUTOCOMPLETE_LIMIT, PUBLIC_FIELDS, autocomplete_values, update_autocomplete,
+    complete as complete_prefix
+)
+from .spotlight import SPOTLIGHT_FRAGMENT_TTL, invalidate_spotlight, spotlight_alumni
+from .feed import post_page
+from .images import variant_srcset, variant_url
+from .storage import is_immutable, media_storage
+from .jobs import enqueue_image_job, pending_images, prefetch_image_states
+from .broadcasts import queue_broadcast
+from .badges import clear_notifications, notify, unread_counts
+from .fragments import invalidate_post_card, post_cards
+from .timeline import backfill_connection, fan_out_post, retract_post, timeline_page
+from .facets import FACET_FIELDS, FACET_LABELS, facet_counts, facet_values, filtered_facet_counts, update_facets
+import json
+import mimetypes
+import os
+
+MAX_MESSAGE_BATCH = 100
+# Hashed originals never change content; anything else, variants included, is revalidated hourly
+MEDIA_IMMUTABLE_CACHE = 'public, max-age=31536000, immutable'
+MEDIA_REVALIDATE_CACHE = 'public, max-age=3600'
 
 def send_registration_email(alumni):
     """Send registration confirmation email to alumni"""
@@ -94,11 +134,9 @@ def send_account_deactivation_email(alumni):
 def index(request):
    
 
-    # Get featured alumni for spotlight (active alumni with profile pictures)
-    featured_alumni = Alumni.objects.filter(
-        is_active=True,
-        profile_pic__isnull=False
-    ).order_by('?')[:4]  # Random 4 alumni
+    # Get featured alumni for spotlight (active alumni with profile pictures).
+    # Lazy, so nothing is queried while the rendered fragment is cached.
+    featured_alumni = SimpleLazyObject(spotlight_alumni)
 
    
    
@@ -107,6 +145,7 @@ def index(request):
         
        
         'featured_alumni': featured_alumni,
+        'spotlight_ttl': SPOTLIGHT_FRAGMENT_TTL,
         
     }
     return render(request, 'alumni_app/index.html', context)
@@ -166,6 +205,11 @@ def register(request):
             send_registration_email(temp_alumni)
             # If email sent successfully, save the alumni record
             temp_alumni.save()
+            if temp_alumni.profile_pic:
+                enqueue_image_job('profile_pic', temp_alumni.id)
+            index_alumni(temp_alumni)
+            update_facets({}, facet_values(temp_alumni))
+            update_autocomplete(temp_alumni.id, {}, autocomplete_values(temp_alumni))
             messages.success(request, 'Registration successful! Please check your email for your Credentials.')
             return redirect('login')
         except Exception as e:
@@ -235,7 +279,7 @@ def alumni_dashboard(request):
             connected_alumni.append(connection.sender)
     
     # Get pending connection requests
-    pending_requests = Connection.objects.filter(receiver=alumni, status='pending')
+    pending_requests = list(Connection.objects.filter(receiver=alumni, status='pending').select_related('sender'))
     
     # Get upcoming events
     upcoming_events = Event.objects.filter(
@@ -248,17 +292,24 @@ def alumni_dashboard(request):
         date__gte=timezone.now()
     ).count()
 
-    # Get unread messages
-    unread_messages = Message.objects.filter(
-        receiver=alumni,
-        is_read=False
-    ).select_related('sender').order_by('-timestamp')[:5]
+    # Get unread messages: received messages past the read watermark of their conversation
+    unread_messages = list(Message.objects.filter(receiver=alumni).filter(
+        models.Exists(ChatParticipant.objects.filter(
+            alumni=alumni,
+            other_participant=models.OuterRef('sender'),
+            last_read_message_id__lt=models.OuterRef('id')
+        ))
+    ).select_related('sender').order_by('-timestamp')[:5])
 
-    # Get unread messages count
-    unread_messages_count = Message.objects.filter(
-        receiver=alumni,
-        is_read=False
-    ).count()
+    # Unread messages count, from the maintained badge counter
+    unread_messages_count = unread_counts(alumni.id)[1]
+    
+    prefetch_image_states(
+        [alumni.profile_pic]
+        + [connected.profile_pic for connected in connected_alumni[:2]]
+        + [connection.sender.profile_pic for connection in pending_requests]
+        + [message.sender.profile_pic for message in unread_messages]
+    )
     
     context = {
         'alumni': alumni,
@@ -276,7 +327,7 @@ def admin_dashboard(request):
     if not request.session.get('admin_id') or not request.session.get('is_admin'):
         return redirect('login')
     
-    alumni_list = Alumni.objects.all()
+    alumni_list, next_cursor = directory_page(Alumni.objects.all(), {})
     feedback_list = Feedback.objects.filter(is_resolved=False)
     
     # Event statistics
@@ -287,6 +338,8 @@ def admin_dashboard(request):
     
     context = {
         'alumni_list': alumni_list,
+        'alumni_count': Alumni.objects.count(),
+        'next_cursor': next_cursor,
         'feedback_list': feedback_list,
         'total_events': total_events,
         'upcoming_events': upcoming_events,
@@ -295,6 +348,41 @@ def admin_dashboard(request):
     }
     return render(request, 'alumni_app/admin_dashboard.html', context)
 
+@never_cache
+def cache_stats(request):
+    if not request.session.get('admin_id') or not request.session.get('is_admin'):
+        return JsonResponse({'status': 'error', 'message': 'Unauthorized'}, status=401)
+    
+    # Counters are per process; each worker reports its own
+    return JsonResponse({'status': 'success', 'post_cards': post_cards.stats()})
+
+@never_cache
+def admin_alumni_page(request):
+    if not request.session.get('admin_id') or not request.session.get('is_admin'):
+        return JsonResponse({'status': 'error', 'message': 'Unauthorized'}, status=401)
+    
+    try:
+        filters, after = decode_directory_cursor(request.GET.get('cursor', ''))
+    except ValueError:
+        return JsonResponse({'status': 'error', 'message': 'Invalid cursor'}, status=400)
+    
+    page, next_cursor = directory_page(filter_directory(Alumni.objects.all(), filters), filters, after)
+    return JsonResponse({
+        'status': 'success',
+        'next_cursor': next_cursor,
+        'alumni': [
+            {
+                'id': alumni.id,
+                'username': alumni.username,
+                'first_name': alumni.first_name,
+                'last_name': alumni.last_name,
+                'email': alumni.email,
+                'is_active': alumni.is_active,
+            }
+            for alumni in page
+        ]
+    })
+
 @never_cache
 def alumni_gallery(request):
     if not request.session.get('alumni_id') or request.session.get('is_admin'):
@@ -304,37 +392,109 @@ def alumni_gallery(request):
     alumni_list = Alumni.objects.filter(is_active=True).exclude(id=current_alumni.id)
     
     # Handle search functionality
-    search_query = request.GET.get('search', '')
-    profession_filter = request.GET.get('profession', '')
-    location_filter = request.GET.get('location', '')
-    
-    if search_query:
-        alumni_list = alumni_list.filter(
-            models.Q(first_name__icontains=search_query) |
-            models.Q(last_name__icontains=search_query)
-        )
-    
-    if profession_filter:
-        alumni_list = alumni_list.filter(profession__icontains=profession_filter)
-    
-    if location_filter:
-        alumni_list = alumni_list.filter(location__icontains=location_filter)
-    
-    # Get connection status for each alumni
-    for alumni in alumni_list:
-        connection = Connection.objects.filter(
-            models.Q(sender=current_alumni, receiver=alumni) |
-            models.Q(sender=alumni, receiver=current_alumni),
-            status='accepted'
-        ).first()
-        alumni.is_connected = True if connection else False
+    filters = directory_filters(request.GET)
+    search_query = filters.get('search', '')
+    profession_filter = filters.get('profession', '')
+    location_filter = filters.get('location', '')
+    alumni_list = filter_directory(alumni_list, filters)
+    
+    # Facet counts come from the precomputed store for at most one exact
+    # selection; free text (search, profession, location) matches by prefix and
+    # several selections narrow further, so those lists are counted directly and
+    # the counts shared between viewers for a short while
+    selected = {facet: value for facet, value in filters.items() if facet != 'search'}
+    counts = None
+    if not search_query and set(selected) <= set(EXACT_FILTERS):
+        counts = facet_counts(selected, exclude=facet_values(current_alumni))
+    if counts is None:
+        counts = filtered_facet_counts(filters, viewer=current_alumni)
+    facets = []
+    for facet in FACET_FIELDS:
+        options = []
+        for value, count in counts[facet]:
+            params = request.GET.copy()
+            params[facet] = value
+            options.append({'value': value, 'count': count, 'query': params.urlencode(),
+                            'selected': str(selected.get(facet, '')).strip() == value})
+        if options:
+            facets.append({'name': facet, 'label': FACET_LABELS[facet], 'options': options})
+    
+    # Only the first page is rendered; the rest is loaded from alumni_gallery_page
+    page, next_cursor = directory_page(alumni_list, filters)
+    
+    # Get connection status for each alumni from the cached adjacency set
+    connected = connected_ids(current_alumni.id)
+    for alumni in page:
+        alumni.is_connected = alumni.id in connected
+    
+    suggested_alumni = suggestions_for(current_alumni.id, k=4)
+    prefetch_image_states([alumni.profile_pic for alumni in page + suggested_alumni])
     
     return render(request, 'alumni_app/alumni_gallery.html', {
-        'alumni_list': alumni_list,
+        'alumni_list': page,
+        'next_cursor': next_cursor,
+        'suggested_alumni': suggested_alumni,
         'search_query': search_query,
         'profession_filter': profession_filter,
-        'location_filter': location_filter
+        'location_filter': location_filter,
+        'facets': facets,
+    })
+
+@never_cache
+def alumni_gallery_page(request):
+    if not request.session.get('alumni_id') or request.session.get('is_admin'):
+        return JsonResponse({'status': 'error', 'message': 'Unauthorized'}, status=401)
+    
+    try:
+        filters, after = decode_directory_cursor(request.GET.get('cursor', ''))
+    except ValueError:
+        return JsonResponse({'status': 'error', 'message': 'Invalid cursor'}, status=400)
+    
+    current_alumni_id = request.session['alumni_id']
+    alumni_list = filter_directory(
+        Alumni.objects.filter(is_active=True).exclude(id=current_alumni_id), filters
+    )
+    page, next_cursor = directory_page(alumni_list, filters, after)
+    connected = connected_ids(current_alumni_id)
+    prefetch_image_states([alumni.profile_pic for alumni in page])
+    
+    return JsonResponse({
+        'status': 'success',
+        'next_cursor': next_cursor,
+        'alumni': [
+            {
+                'id': alumni.id,
+                'first_name': alumni.first_name,
+                'last_name': alumni.last_name,
+                'profession': alumni.profession,
+                'location': alumni.location,
+                'profile_pic': variant_url(alumni.profile_pic, 240) or None,
+                'profile_pic_srcset': variant_srcset(alumni.profile_pic),
+                'is_connected': alumni.id in connected,
+            }
+            for alumni in page
+        ]
+    })
+
+def autocomplete(request):
+    field = request.GET.get('field', 'name')
+    if field not in AUTOCOMPLETE_FIELDS:
+        return JsonResponse({'status': 'error', 'message': 'Unknown field'}, status=400)
+    if field not in PUBLIC_FIELDS and not (request.session.get('alumni_id') or request.session.get('admin_id')):
+        return JsonResponse({'status': 'error', 'message': 'Unauthorized'}, status=401)
+    
+    try:
+        limit = min(int(request.GET.get('limit', AUTOCOMPLETE_LIMIT)), AUTOCOMPLETE_LIMIT)
+    except ValueError:
+        limit = AUTOCOMPLETE_LIMIT
+    
+    # Served from the in-process prefix index; no database query once it is built
+    response = JsonResponse({
+        'status': 'success',
+        'results': complete_prefix(field, request.GET.get('q', '')[:100], limit)
     })
+    response['Cache-Control'] = 'private, max-age=60'
+    return response
 
 @never_cache
 def notifications(request):
@@ -345,10 +505,21 @@ def notifications(request):
     notifications = Notification.objects.filter(alumni=alumni).order_by('-created_at')
     
     # Mark notifications as read when viewed
-    Notification.objects.filter(alumni=alumni, is_read=False).update(is_read=True)
+    with transaction.atomic():
+        Notification.objects.filter(alumni=alumni, is_read=False).update(is_read=True)
+        clear_notifications(alumni.id)
     
     return render(request, 'alumni_app/notifications.html', {'notifications': notifications})
 
+@never_cache
+def unread_badges(request):
+    """Nav badge counts: one counter-row lookup, cheap enough to poll"""
+    if not request.session.get('alumni_id') or request.session.get('is_admin'):
+        return JsonResponse({'status': 'error', 'message': 'Unauthorized'}, status=401)
+    
+    notifications, messages_count = unread_counts(request.session['alumni_id'])
+    return JsonResponse({'status': 'success', 'notifications': notifications, 'messages': messages_count})
+
 @never_cache
 def submit_feedback(request):
     if not request.session.get('alumni_id') or request.session.get('is_admin'):
@@ -376,10 +547,7 @@ def resolve_feedback(request, feedback_id):
     feedback.save()
     
     # Create notification for the alumni who submitted the feedback
-    Notification.objects.create(
-        alumni=feedback.alumni,
-        message="Your feedback has been resolved by the admin"
-    )
+    notify(feedback.alumni_id, "Your feedback has been resolved by the admin")
     
     messages.success(request, 'Feedback marked as resolved')
     return redirect('admin_dashboard')
@@ -390,8 +558,15 @@ def toggle_alumni_status(request, alumni_id):
         return redirect('login')
     
     alumni = Alumni.objects.get(id=alumni_id)
+    facets_before = facet_values(alumni)
+    autocomplete_before = autocomplete_values(alumni)
     alumni.is_active = not alumni.is_active
     alumni.save()
+    index_alumni(alumni)
+    update_facets(facets_before, facet_values(alumni))
+    update_autocomplete(alumni.id, autocomplete_before, autocomplete_values(alumni))
+    if alumni.profile_pic:
+        invalidate_spotlight()
     
     # Send appropriate email based on the new status
     try:
@@ -454,9 +629,31 @@ def admin_events(request):
         return redirect('login')
     
     admin = Adminn.objects.get(id=request.session.get('admin_id'))
-    events = Event.objects.all().order_by('-created_at')
+    events = Event.objects.all().order_by('-created_at').prefetch_related('broadcasts')
     return render(request, 'alumni_app/admin_events.html', {'events': events})
 
+@never_cache
+def broadcast_progress(request):
+    if not request.session.get('admin_id') or not request.session.get('is_admin'):
+        return JsonResponse({'status': 'error', 'message': 'Unauthorized'}, status=401)
+    
+    try:
+        ids = [int(value) for value in request.GET.getlist('id')[:50]]
+    except ValueError:
+        return JsonResponse({'status': 'error', 'message': 'Invalid broadcast id'}, status=400)
+    return JsonResponse({
+        'status': 'success',
+        'broadcasts': [
+            {
+                'id': broadcast.id,
+                'status': broadcast.status,
+                'sent': broadcast.sent,
+                'total': broadcast.total,
+            }
+            for broadcast in Broadcast.objects.filter(id__in=ids)
+        ]
+    })
+
 @never_cache
 def create_event(request):
     if not request.session.get('admin_id') or not request.session.get('is_admin'):
@@ -479,15 +676,10 @@ def create_event(request):
         )
         event.save()
         
-        # Create notifications for all active alumni
-        active_alumni = Alumni.objects.filter(is_active=True)
-        for alumni in active_alumni:
-            Notification.objects.create(
-                alumni=alumni,
-                message=f"New event created: {title} on {date}"
-            )
+        # Notifying every active alumnus is left to the send_broadcasts worker
+        queue_broadcast(f"New event created: {title} on {date}", event=event)
         
-        messages.success(request, 'Event created successfully!')
+        messages.success(request, 'Event created successfully! Alumni are being notified in the background.')
         return redirect('admin_events')
     
     return render(request, 'alumni_app/create_event.html')
@@ -554,19 +746,14 @@ def browse_alumni(request):
     
     # Get connection status and chat room for each alumni
     for alumni in connected_alumni:
-        connection = Connection.objects.filter(
-            models.Q(sender=current_alumni, receiver=alumni) |
-            models.Q(sender=alumni, receiver=current_alumni)
-        ).first()
-        alumni.connection_status = connection.status if connection else None
+        # Only accepted connections are listed here
+        alumni.connection_status = 'accepted'
         
         # Get or create chat room
-        chat_room = ChatRoom.objects.filter(participants=current_alumni).filter(participants=alumni).first()
-        if not chat_room:
-            chat_room = ChatRoom.objects.create()
-            chat_room.participants.add(current_alumni, alumni)
+        chat_room = get_or_create_direct_room(current_alumni, alumni)
         alumni.chat_room = chat_room
     
+    prefetch_image_states([alumni.profile_pic for alumni in connected_alumni])
     return render(request, 'alumni_app/browse_alumni.html', {'alumni_list': connected_alumni})
 
 @never_cache
@@ -595,12 +782,11 @@ def send_connection_request(request, receiver_id):
     
     # Create connection request
     connection = Connection.objects.create(sender=sender, receiver=receiver)
+    invalidate_connections(sender.id, receiver.id)
+    connection_changed(sender.id, receiver.id, connection.status)
     
     # Create notification for receiver
-    Notification.objects.create(
-        alumni=receiver,
-        message=f"{sender.first_name} {sender.last_name} sent you a connection request"
-    )
+    notify(receiver.id, f"{sender.first_name} {sender.last_name} sent you a connection request")
     
     messages.success(request, 'Connection request sent successfully')
     return redirect('browse_alumni')
@@ -615,21 +801,19 @@ def respond_connection_request(request, connection_id, action):
     if action == 'accept':
         connection.status = 'accepted'
         # Create notification for sender
-        Notification.objects.create(
-            alumni=connection.sender,
-            message=f"{connection.receiver.first_name} {connection.receiver.last_name} accepted your connection request"
-        )
+        notify(connection.sender_id, f"{connection.receiver.first_name} {connection.receiver.last_name} accepted your connection request")
         messages.success(request, 'Connection request accepted')
     else:
         connection.status = 'rejected'
         # Create notification for sender
-        Notification.objects.create(
-            alumni=connection.sender,
-            message=f"{connection.receiver.first_name} {connection.receiver.last_name} rejected your connection request"
-        )
+        notify(connection.sender_id, f"{connection.receiver.first_name} {connection.receiver.last_name} rejected your connection request")
         messages.info(request, 'Connection request rejected')
     
     connection.save()
+    invalidate_connections(connection.sender_id, connection.receiver_id)
+    connection_changed(connection.sender_id, connection.receiver_id, connection.status)
+    if connection.status == 'accepted':
+        backfill_connection(connection.sender_id, connection.receiver_id)
     return redirect('alumni_dashboard')
 
 @never_cache
@@ -647,6 +831,9 @@ def create_post(request):
             if image:
                 post.image = image
             post.save()
+            if post.image:
+                enqueue_image_job('post_image', post.id)
+            fan_out_post(post)
             messages.success(request, 'Post created successfully!')
             return redirect('view_posts')
         else:
@@ -674,14 +861,18 @@ def edit_post(request, post_id):
         if content:
             post.content = content
             
+            # Deleting releases this post's reference; the blob may be shared
             if remove_image:
-                post.image.delete()
+                post.image.delete(save=False)
             elif image:
                 if post.image:
-                    post.image.delete()
+                    post.image.delete(save=False)
                 post.image = image
                 
             post.save()
+            if image and not remove_image:
+                enqueue_image_job('post_image', post.id)
+            invalidate_post_card(post.id)
             messages.success(request, 'Post updated successfully!')
             return redirect('view_posts')
         else:
@@ -694,8 +885,130 @@ def view_posts(request):
     if not request.session.get('alumni_id') or request.session.get('is_admin'):
         return redirect('login')
     
-    posts = Post.objects.filter(is_active=True).order_by('-created_at')
-    return render(request, 'alumni_app/view_posts.html', {'posts': posts})
+    # "connections" reads the alumni's materialized timeline instead of the global feed
+    feed = 'connections' if request.GET.get('feed') == 'connections' else 'all'
+    if feed == 'connections':
+        posts, next_cursor = timeline_page(request.session['alumni_id'])
+    else:
+        posts, next_cursor = post_page(Post.objects.filter(is_active=True).select_related('author'))
+    prefetch_image_states([post.image for post in posts])
+    return render(request, 'alumni_app/view_posts.html', {'posts': posts, 'next_cursor': next_cursor, 'feed': feed})
+
+@never_cache
+def posts_feed(request):
+    if not request.session.get('alumni_id') or request.session.get('is_admin'):
+        return JsonResponse({'status': 'error', 'message': 'Unauthorized'}, status=401)
+    
+    before = request.GET.get('before') or None
+    try:
+        if request.GET.get('feed') == 'connections':
+            posts, next_cursor = timeline_page(request.session['alumni_id'], before)
+        else:
+            posts, next_cursor = post_page(Post.objects.filter(is_active=True).select_related('author'), before)
+    except ValueError:
+        return JsonResponse({'status': 'error', 'message': 'Invalid cursor'}, status=400)
+    
+    alumni_id = request.session['alumni_id']
+    prefetch_image_states([post.image for post in posts])
+    return JsonResponse({
+        'status': 'success',
+        'next_cursor': next_cursor,
+        'posts': [
+            {
+                'id': post.id,
+                'author': {
+                    'id': post.author_id,
+                    'first_name': post.author.first_name,
+                    'last_name': post.author.last_name,
+                },
+                'mine': post.author_id == alumni_id,
+                'content': post.content,
+                'image': variant_url(post.image, 480) or None,
+                'image_srcset': variant_srcset(post.image),
+                'created_at': post.created_at.isoformat(),
+                'created_at_display': date_format(post.created_at, 'F j, Y, g:i a'),
+            }
+            for post in posts
+        ]
+    })
+
+@never_cache
+def image_status(request):
+    """Poll target for image placeholders: ?image=<kind>:<id>:<width>, repeated"""
+    if not request.session.get('alumni_id') and not request.session.get('is_admin'):
+        return JsonResponse({'status': 'error', 'message': 'Unauthorized'}, status=401)
+    
+    requested = {}
+    for key in request.GET.getlist('image')[:50]:
+        try:
+            kind, object_id, width = key.split(':')
+            requested[(kind, int(object_id))] = (key, int(width))
+        except ValueError:
+            return JsonResponse({'status': 'error', 'message': 'Invalid image key'}, status=400)
+        if kind not in ('profile_pic', 'post_image'):
+            return JsonResponse({'status': 'error', 'message': 'Invalid image key'}, status=400)
+    
+    pending = pending_images(requested)
+    images = {}
+    for (kind, object_id), (key, width) in requested.items():
+        if (kind, object_id) in pending:
+            images[key] = {'ready': False}
+            continue
+        if kind == 'profile_pic':
+            instance = Alumni.objects.filter(id=object_id).only('profile_pic').first()
+            field_file = instance.profile_pic if instance else None
+        else:
+            instance = Post.objects.filter(id=object_id).only('image').first()
+            field_file = instance.image if instance else None
+        images[key] = {
+            'ready': True,
+            'src': variant_url(field_file, width) if field_file else None,
+            'srcset': variant_srcset(field_file) if field_file else '',
+        }
+    return JsonResponse({'status': 'success', 'images': images})
+
+@require_safe
+def serve_media(request, path):
+    """Uploaded media with validators, byte ranges and far-future caching of hashed names.
+
+    Full responses stream the open file so the WSGI server can use sendfile. With
+    MEDIA_ACCEL_REDIRECT set, the file itself is handed to nginx instead.
+    """
+    try:
+        full_path = media_storage.path(path)
+    except SuspiciousFileOperation:
+        raise Http404
+    try:
+        stat = os.stat(full_path)
+    except OSError:
+        raise Http404
+    if not os.path.isfile(full_path):
+        raise Http404
+    
+    etag = f'"{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+    headers = {
+        'ETag': etag,
+        'Last-Modified': http_date(stat.st_mtime),
+        'Cache-Control': MEDIA_IMMUTABLE_CACHE if is_immutable(path) else MEDIA_REVALIDATE_CACHE,
+        'Accept-Ranges': 'bytes',
+    }
+    response = get_conditional_response(request, etag=etag, last_modified=int(stat.st_mtime))
+    if response is None:
+        content_type = mimetypes.guess_type(full_path)[0] or 'application/octet-stream'
+        accel_prefix = getattr(settings, 'MEDIA_ACCEL_REDIRECT', None)
+        # A Range is only honoured for the representation the client already has
+        if_range = request.META.get('HTTP_IF_RANGE')
+        ranged = 'HTTP_RANGE' in request.META and if_range in (None, etag, headers['Last-Modified'])
+        if accel_prefix:
+            response = HttpResponse(content_type=content_type)
+            response['X-Accel-Redirect'] = accel_prefix + path
+        elif ranged:
+            response = RangedFileResponse(request, open(full_path, 'rb'), content_type=content_type)
+        else:
+            response = FileResponse(open(full_path, 'rb'), content_type=content_type)
+    for header, value in headers.items():
+        response[header] = value
+    return response
 
 @never_cache
 def delete_post(request, post_id):
@@ -706,6 +1019,8 @@ def delete_post(request, post_id):
     if post.author.id == request.session['alumni_id']:
         post.is_active = False
         post.save()
+        retract_post(post)
+        invalidate_post_card(post.id)
         messages.success(request, 'Post deleted successfully!')
     else:
         messages.error(request, 'You can only delete your own posts')
@@ -721,12 +1036,22 @@ def view_alumni_profile(request, alumni_id):
     
     # Get connection status if the viewer is an alumni
     if request.session.get('alumni_id'):
-        current_alumni = Alumni.objects.get(id=request.session['alumni_id'])
-        connection = Connection.objects.filter(
-            models.Q(sender=current_alumni, receiver=alumni) |
-            models.Q(sender=alumni, receiver=current_alumni)
-        ).first()
-        alumni.connection_status = connection.status if connection else None
+        current_alumni_id = request.session['alumni_id']
+        if are_connected(current_alumni_id, alumni.id):
+            alumni.connection_status = 'accepted'
+        else:
+            # Pending and rejected requests are not cached
+            connection = Connection.objects.filter(
+                models.Q(sender_id=current_alumni_id, receiver=alumni) |
+                models.Q(sender=alumni, receiver_id=current_alumni_id)
+            ).first()
+            alumni.connection_status = connection.status if connection else None
+            # Shortest chain of accepted connections, for "2nd/3rd-degree via X"
+            path = introduction_path(current_alumni_id, alumni.id)
+            if path:
+                intermediaries = Alumni.objects.in_bulk(path[1:-1])
+                alumni.connection_degree = len(path) - 1
+                alumni.introduction_path = [intermediaries[step] for step in path[1:-1]]
     
     context = {
         'profile_alumni': alumni,
@@ -739,30 +1064,11 @@ def inbox(request):
         return redirect('login')
     
     alumni = Alumni.objects.get(id=request.session['alumni_id'])
-    # Get all chat rooms where the user is a participant
-    chat_rooms = ChatRoom.objects.filter(participants=alumni)
-    
-    # Get the latest message for each chat room
-    chat_list = []
-    for room in chat_rooms:
-        other_participant = room.participants.exclude(id=alumni.id).first()
-        last_message = Message.objects.filter(
-            Q(sender=alumni, receiver=other_participant) |
-            Q(sender=other_participant, receiver=alumni)
-        ).order_by('-timestamp').first()
-            
-        unread_count = Message.objects.filter(
-            sender=other_participant,
-            receiver=alumni,
-            is_read=False
-        ).count()
-        
-        chat_list.append({
-            'room': room,
-            'other_participant': other_participant,
-            'last_message': last_message,
-            'unread_count': unread_count
-        })
+    # One joined query over the per-participant summaries gives the whole conversation list
+    chat_list = list(ChatParticipant.objects.filter(
+        alumni=alumni
+    ).select_related('chat_room', 'other_participant', 'last_message').order_by('-chat_room__last_message'))
+    prefetch_image_states([chat.other_participant.profile_pic for chat in chat_list if chat.other_participant])
     
     context = {
         'chat_list': chat_list
@@ -771,39 +1077,17 @@ def inbox(request):
     # If room parameter is provided, get chat room content
     room_id = request.GET.get('room')
     if room_id:
-        try:
-            room = ChatRoom.objects.get(id=room_id, participants=alumni)
-            other_participant = room.participants.exclude(id=alumni.id).first()
-            
+        own_state, other_state = room_states(room_id, alumni.id) if room_id.isdigit() else (None, None)
+        if own_state:
             # Mark messages as read
-            Message.objects.filter(
-                sender=other_participant,
-                receiver=alumni,
-                is_read=False
-            ).update(is_read=True)
-            
-            # Get messages from the last 5 days
-            five_days_ago = timezone.now() - timezone.timedelta(days=5)
-            messages = Message.objects.filter(
-                Q(sender=alumni, receiver=other_participant) |
-                Q(sender=other_participant, receiver=alumni),
-                timestamp__gte=five_days_ago
-            ).order_by('timestamp')
-            
-            # Check if this chat was cleared by the current user
-            cleared_chat = ClearedChat.objects.filter(alumni=alumni, chat_room=room).first()
-            if cleared_chat:
-                # Only show messages after the clear timestamp
-                messages = messages.filter(timestamp__gt=cleared_chat.cleared_at)
+            mark_room_read(own_state)
             
+            # The conversation itself is loaded page by page from chat_room / chat_history
             context.update({
-                'room': room,
-                'other_participant': other_participant,
-                'messages': messages,
+                'room': own_state.chat_room,
+                'other_participant': own_state.other_participant,
                 'current_user': alumni
             })
-        except ChatRoom.DoesNotExist:
-            pass
     
     return render(request, 'alumni_app/inbox.html', context)
 
@@ -813,37 +1097,124 @@ def chat_room(request, room_id):
         return redirect('login')
     
     alumni = Alumni.objects.get(id=request.session['alumni_id'])
-    room = get_object_or_404(ChatRoom, id=room_id, participants=alumni)
-    other_participant = room.participants.exclude(id=alumni.id).first()
+    own_state, other_state = room_states(room_id, alumni.id)
+    if own_state is None:
+        raise Http404('Chat room not found')
+    room = own_state.chat_room
+    other_participant = own_state.other_participant
     
     # Mark messages as read
-    Message.objects.filter(
-        sender=other_participant,
-        receiver=alumni,
-        is_read=False
-    ).update(is_read=True)
-    
-    # Get messages from the last 5 days
-    five_days_ago = timezone.now() - timezone.timedelta(days=5)
-    messages = Message.objects.filter(
-        Q(sender=alumni, receiver=other_participant) |
-        Q(sender=other_participant, receiver=alumni),
-        timestamp__gte=five_days_ago
-    ).order_by('timestamp')
-    
-    # Check if this chat was cleared by the current user
+    mark_room_read(own_state)
+    
+    # Only show messages after the user's last clear, newest page first
     cleared_chat = ClearedChat.objects.filter(alumni=alumni, chat_room=room).first()
-    if cleared_chat:
-        # Only show messages after the clear timestamp
-        messages = messages.filter(timestamp__gt=cleared_chat.cleared_at)
+    messages, history_cursor = message_history_page(
+        alumni.id,
+        other_participant.id,
+        cleared_at=cleared_chat.cleared_at if cleared_chat else None
+    )
+    # Read receipts come from the other participant's watermark
+    for message in messages:
+        message.is_read = is_read_by(other_state, message.id)
     
     return render(request, 'alumni_app/chat_room.html', {
         'room': room,
         'other_participant': other_participant,
         'messages': messages,
+        'history_cursor': history_cursor,
         'current_user': alumni
     })
 
+@never_cache
+def chat_history(request, room_id):
+    """Return the page of messages older than the given cursor as JSON"""
+    if not request.session.get('alumni_id') or request.session.get('is_admin'):
+        return JsonResponse({'status': 'error', 'message': 'Please login to view messages'}, status=403)
+    
+    alumni_id = request.session['alumni_id']
+    own_state, other_state = room_states(room_id, alumni_id)
+    if own_state is None:
+        return JsonResponse({'status': 'error', 'message': 'Chat room not found'}, status=404)
+    cleared_at = ClearedChat.objects.filter(
+        alumni_id=alumni_id, chat_room_id=room_id
+    ).values_list('cleared_at', flat=True).first()
+    
+    try:
+        page, next_cursor = message_history_page(
+            alumni_id, own_state.other_participant_id, cleared_at=cleared_at, before=request.GET.get('before') or None
+        )
+    except ValueError:
+        return JsonResponse({'status': 'error', 'message': 'Invalid cursor'}, status=400)
+    
+    return JsonResponse({
+        'status': 'success',
+        'next_cursor': next_cursor,
+        'messages': [
+            {
+                'id': message.id,
+                'mine': message.sender_id == alumni_id,
+                'content': message.content,
+                'timestamp': message.timestamp.strftime('%H:%M'),
+                'is_read': is_read_by(other_state, message.id)
+            }
+            for message in page
+        ]
+    })
+
+@never_cache
+def chat_messages(request, room_id):
+    """Return only the messages newer than the client's last seen id as JSON"""
+    if not request.session.get('alumni_id') or request.session.get('is_admin'):
+        return JsonResponse({'status': 'error', 'message': 'Please login to view messages'}, status=403)
+
+    alumni_id = request.session['alumni_id']
+    try:
+        after = int(request.GET.get('after', 0))
+    except ValueError:
+        return JsonResponse({'status': 'error', 'message': 'Invalid cursor'}, status=400)
+
+    # One lookup on the participant rows gives membership, the other participant and both watermarks
+    own_state, other_state = room_states(room_id, alumni_id)
+    if own_state is None:
+        return JsonResponse({'status': 'error', 'message': 'Chat room not found'}, status=404)
+    other_id = own_state.other_participant_id
+
+    # Messages newer than the cursor, hiding anything the user has cleared
+    new_messages = list(
+        Message.objects.filter(
+            Q(sender_id=alumni_id, receiver_id=other_id) |
+            Q(sender_id=other_id, receiver_id=alumni_id),
+            id__gt=after
+        ).exclude(
+            models.Exists(ClearedChat.objects.filter(
+                alumni_id=alumni_id,
+                chat_room_id=room_id,
+                cleared_at__gte=models.OuterRef('timestamp')
+            ))
+        ).order_by('id').values('id', 'sender_id', 'content', 'timestamp')[:100]
+    )
+
+    if not new_messages:
+        return HttpResponseNotModified()
+
+    # Advance the read watermark; nothing is written if it has not moved
+    mark_room_read(own_state, new_messages[-1]['id'])
+
+    return JsonResponse({
+        'status': 'success',
+        'last_id': new_messages[-1]['id'],
+        'messages': [
+            {
+                'id': m['id'],
+                'mine': m['sender_id'] == alumni_id,
+                'content': m['content'],
+                'timestamp': m['timestamp'].strftime('%H:%M'),
+                'is_read': is_read_by(other_state, m['id'])
+            }
+            for m in new_messages
+        ]
+    })
+
 @never_cache
 def send_message(request):
     if not request.session.get('alumni_id') or request.session.get('is_admin'):
@@ -852,6 +1223,7 @@ def send_message(request):
     if request.method == 'POST':
         receiver_id = request.POST.get('receiver_id')
         content = request.POST.get('content')
+        client_key = request.POST.get('client_key') or None
         
         if not content:
             return JsonResponse({'status': 'error', 'message': 'Message content is required'})
@@ -860,37 +1232,45 @@ def send_message(request):
         receiver = get_object_or_404(Alumni, id=receiver_id)
         
         # Check if users are connected
-        connection = Connection.objects.filter(
-            Q(sender=sender, receiver=receiver) |
-            Q(sender=receiver, receiver=sender),
-            status='accepted'
-        ).first()
-        
-        if not connection:
+        if not are_connected(sender.id, receiver.id):
             return JsonResponse({'status': 'error', 'message': 'You can only message connected alumni'})
         
         # Get or create chat room
-        chat_room = ChatRoom.objects.filter(participants=sender).filter(participants=receiver).first()
-        if not chat_room:
-            chat_room = ChatRoom.objects.create()
-            chat_room.participants.add(sender, receiver)
-        
-        # Create message
-        message = Message.objects.create(
-            sender=sender,
-            receiver=receiver,
-            content=content
-        )
-        
-        
+        chat_room = get_or_create_direct_room(sender, receiver)
         
-        # Update chat room's last message timestamp
-        chat_room.last_message = timezone.now()
-        chat_room.save()
+        # A retried send with the same key returns the message stored the first time
+        message = Message.objects.filter(sender=sender, client_key=client_key).first() if client_key else None
+        if message is None:
+            try:
+                with transaction.atomic():
+                    # Create message
+                    message = Message.objects.create(
+                        sender=sender,
+                        receiver=receiver,
+                        content=content,
+                        client_key=client_key
+                    )
+                    
+                    # Update chat room's last message timestamp
+                    chat_room.last_message = timezone.now()
+                    chat_room.save()
+                    record_message(chat_room, message)
+                    
+                    # Push the message to anyone with this chat open over a websocket
+                    publish_messages(chat_room, [message])
+            except IntegrityError:
+                # A concurrent retry with the same key stored it first
+                message = Message.objects.filter(sender=sender, client_key=client_key).first() if client_key else None
+                if message is None:
+                    raise
+        if message.receiver_id != receiver.id:
+            # Keys are unique per sender, so a retry must go to the same receiver
+            return JsonResponse({'status': 'error', 'message': 'This message was already sent to someone else'}, status=409)
         
         return JsonResponse({
             'status': 'success',
             'message': {
+                'id': message.id,
                 'content': message.content,
                 'timestamp': message.timestamp.strftime('%H:%M'),
                 'is_read': message.is_read
@@ -899,6 +1279,103 @@ def send_message(request):
     
     return JsonResponse({'status': 'error', 'message': 'Invalid request method'})
 
+@never_cache
+def send_message_batch(request):
+    """Store an ordered list of messages to one connection, e.g. a flushed offline queue.
+
+    Expects a JSON body {"receiver_id": ..., "messages": [{"content": ..., "client_key": ...}, ...]}.
+    Messages whose client_key was already stored, or repeated in the batch, are not
+    inserted again and come back with "duplicate": true.
+    """
+    if not request.session.get('alumni_id') or request.session.get('is_admin'):
+        return JsonResponse({'status': 'error', 'message': 'Please login to send messages'})
+    
+    if request.method != 'POST':
+        return JsonResponse({'status': 'error', 'message': 'Invalid request method'})
+    
+    try:
+        data = json.loads(request.body)
+        receiver_id = int(data['receiver_id'])
+        items = [
+            {'content': str(item['content']), 'client_key': str(item['client_key'])[:64] if item.get('client_key') else None}
+            for item in data['messages']
+        ]
+    except (ValueError, KeyError, TypeError):
+        return JsonResponse({'status': 'error', 'message': 'Invalid message batch'}, status=400)
+    
+    if not items or len(items) > MAX_MESSAGE_BATCH:
+        return JsonResponse({'status': 'error', 'message': f'Send between 1 and {MAX_MESSAGE_BATCH} messages'}, status=400)
+    if not all(item['content'] for item in items):
+        return JsonResponse({'status': 'error', 'message': 'Message content is required'}, status=400)
+    
+    sender = Alumni.objects.get(id=request.session['alumni_id'])
+    receiver = get_object_or_404(Alumni, id=receiver_id)
+    
+    # Check if users are connected, once for the whole batch
+    if not are_connected(sender.id, receiver.id):
+        return JsonResponse({'status': 'error', 'message': 'You can only message connected alumni'})
+    
+    chat_room = get_or_create_direct_room(sender, receiver)
+    
+    keys = [item['client_key'] for item in items if item['client_key']]
+    with transaction.atomic():
+        # A concurrent retry may store some of these keys first; they are then
+        # looked up again and only the rest inserted, so every pass has fewer
+        # keys left to race on
+        while True:
+            existing = {
+                message.client_key: message
+                for message in Message.objects.filter(sender=sender, client_key__in=keys)
+            }
+            if any(message.receiver_id != receiver.id for message in existing.values()):
+                return JsonResponse({'status': 'error', 'message': 'A message in this batch was already sent to someone else'}, status=409)
+            
+            new_messages = []
+            seen_keys = set()
+            for item in items:
+                key = item['client_key']
+                if key and (key in existing or key in seen_keys):
+                    continue
+                if key:
+                    seen_keys.add(key)
+                new_messages.append(Message(sender=sender, receiver=receiver, content=item['content'], client_key=key))
+            
+            if not new_messages:
+                break
+            try:
+                with transaction.atomic():
+                    Message.objects.bulk_create(new_messages)
+                break
+            except IntegrityError:
+                if not Message.objects.filter(sender=sender, client_key__in=seen_keys).exists():
+                    raise
+        
+        if new_messages:
+            chat_room.last_message = timezone.now()
+            chat_room.save(update_fields=['last_message'])
+            record_message(chat_room, new_messages[-1], count=len(new_messages))
+            publish_messages(chat_room, new_messages)
+    
+    stored = {message.client_key: message for message in new_messages if message.client_key}
+    stored.update(existing)
+    unkeyed = iter(message for message in new_messages if not message.client_key)
+    results = []
+    reported = set()
+    for item in items:
+        key = item['client_key']
+        message = stored[key] if key else next(unkeyed)
+        results.append({
+            'client_key': key,
+            'id': message.id,
+            'timestamp': message.timestamp.strftime('%H:%M'),
+            # Stored by an earlier request, or repeated earlier in this batch
+            'duplicate': key in existing or key in reported
+        })
+        if key:
+            reported.add(key)
+    
+    return JsonResponse({'status': 'success', 'messages': results})
+
 @never_cache
 def start_chat(request, alumni_id):
     if not request.session.get('alumni_id') or request.session.get('is_admin'):
@@ -908,20 +1385,11 @@ def start_chat(request, alumni_id):
     other_alumni = get_object_or_404(Alumni, id=alumni_id)
     
     # Check if users are connected
-    connection = Connection.objects.filter(
-        Q(sender=sender, receiver=other_alumni) |
-        Q(sender=other_alumni, receiver=sender),
-        status='accepted'
-    ).first()
-    
-    if not connection:
+    if not are_connected(sender.id, other_alumni.id):
         return redirect('inbox')
     
     # Get or create chat room
-    chat_room = ChatRoom.objects.filter(participants=sender).filter(participants=other_alumni).first()
-    if not chat_room:
-        chat_room = ChatRoom.objects.create()
-        chat_room.participants.add(sender, other_alumni)
+    chat_room = get_or_create_direct_room(sender, other_alumni)
     
     return redirect('chat_room', room_id=chat_room.id)
 
@@ -965,6 +1433,8 @@ def edit_profile(request):
         bio = request.POST.get('bio')
         profile_pic = request.FILES.get('profile_pic')
         
+        facets_before = facet_values(alumni)
+        autocomplete_before = autocomplete_values(alumni)
         # Update alumni information
         alumni.first_name = first_name
         alumni.last_name = last_name
@@ -977,10 +1447,19 @@ def edit_profile(request):
         alumni.bio = bio
         
         # Update profile picture if a new one is provided
+        previous_pic = alumni.profile_pic.name
         if profile_pic:
             alumni.profile_pic = profile_pic
+            invalidate_spotlight()
         
         alumni.save()
+        if profile_pic:
+            # Release the old picture only once the new one is referenced
+            alumni.profile_pic.storage.delete(previous_pic)
+            enqueue_image_job('profile_pic', alumni.id)
+        index_alumni(alumni)
+        update_facets(facets_before, facet_values(alumni))
+        update_autocomplete(alumni.id, autocomplete_before, autocomplete_values(alumni))
         messages.success(request, "Profile updated successfully!")
         return redirect('view_alumni_profile', alumni_id=alumni.id)
     
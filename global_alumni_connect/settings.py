@@ -129,6 +129,10 @@ STATICFILES_DIRS = [
 # Media files configuration
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+# Set to an nginx "internal" location (e.g. '/protected-media/') mapped to
+# MEDIA_ROOT to let nginx send media files with sendfile after the app has
+# handled the caching headers
+MEDIA_ACCEL_REDIRECT = None
 
 LOGIN_URL = 'login'
 LOGIN_REDIRECT_URL = 'alumni_dashboard'
@@ -146,3 +150,12 @@ DEFAULT_FROM_EMAIL = '###########################'  # Add your Gmail address her
 # reCAPTCHA Configuration
 RECAPTCHA_SITE_KEY = '######################################'  # Replace with your reCAPTCHA site key
 RECAPTCHA_SECRET_KEY = '####################################'  # Replace with your reCAPTCHA secret key
+
+# Pub/sub backend that pushes new chat messages to websocket subscribers.
+# LocalBroker only reaches sockets in the same process; point this at a
+# shared backend (e.g. Redis-based) when running several ASGI workers.
+CHAT_BROKER = 'alumni_app.pubsub.LocalBroker'
+
+# Build the in-memory autocomplete indexes in the background when a process
+# serves its first request, instead of on the first autocomplete lookup.
+AUTOCOMPLETE_WARM_UP = True
@@ -17,12 +17,11 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path,include
 from django.conf import settings
-from django.conf.urls.static import static
+from alumni_app import views as alumni_views
 
 urlpatterns = [
     path('admin/', admin.site.urls),
+    # Served by the app in production too: validators, ranges and immutable caching
+    path(settings.MEDIA_URL.lstrip('/') + '<path:path>', alumni_views.serve_media, name='media'),
     path('',include('alumni_app.urls')),
 ]
-
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)